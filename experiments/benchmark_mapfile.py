@@ -0,0 +1,88 @@
+"""
+Compares readfile (full copy) against mapfile (mmap) on large files.
+
+    python3 experiments/benchmark_mapfile.py 100 500 2000
+
+Each argument is a file size in MB (defaults to 100 500 2000). For every size
+a scratch file is generated, then both read paths are timed on a
+regex scan for a needle near the end of the file and on a small slice from
+the middle. Peak RSS growth is reported alongside the wall-clock time.
+"""
+
+import os
+import re
+import sys
+import time
+import resource
+import tempfile
+
+from kevinlulee.file_utils import readfile, mapfile
+
+CHUNK = b"lorem ipsum dolor sit amet, consectetur adipiscing elit\n" * 1024
+NEEDLE = b"NEEDLE-7c1f"
+
+
+def create_scratch_file(directory, megabytes):
+    path = os.path.join(directory, f"scratch-{megabytes}mb.bin")
+    target = megabytes * 1024 * 1024
+    with open(path, "wb") as f:
+        written = 0
+        while written < target:
+            written += f.write(CHUNK)
+        f.write(NEEDLE)
+    return path
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def timed(label, fn):
+    rss = peak_rss_mb()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<28} {elapsed:8.3f}s   peak rss +{peak_rss_mb() - rss:8.1f} MB")
+
+
+def bench_read_bytes(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    re.search(NEEDLE, data)
+    data[len(data) // 2 : len(data) // 2 + 4096]
+
+
+def bench_readfile_text(path):
+    data = readfile(path)
+    re.search(NEEDLE.decode(), data)
+
+
+def bench_mapfile(path):
+    with mapfile(path) as m:
+        re.search(NEEDLE, m)
+        m[len(m) // 2 : len(m) // 2 + 4096]
+
+
+def bench_mapfile_slice(path):
+    with mapfile(path) as m:
+        view = memoryview(m)
+        view[len(m) // 2 : len(m) // 2 + 4096].tobytes()
+        view.release()
+
+
+def main(sizes):
+    with tempfile.TemporaryDirectory() as directory:
+        for megabytes in sizes:
+            path = create_scratch_file(directory, megabytes)
+            print(f"{megabytes} MB")
+            # mmap first, so its rss numbers are not hidden behind the peak
+            # left by the copying readers.
+            timed("mapfile slice", lambda: bench_mapfile_slice(path))
+            timed("mapfile regex + slice", lambda: bench_mapfile(path))
+            timed("f.read() regex + slice", lambda: bench_read_bytes(path))
+            timed("readfile (text) regex", lambda: bench_readfile_text(path))
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or [100, 500, 2000])
@@ -0,0 +1,66 @@
+"""
+Per-format parse and dump throughput of the registered serializers,
+next to the pure-Python implementations readfile/writefile used before.
+
+    python3 experiments/benchmark_serializers.py [records]
+"""
+
+import sys
+import time
+import json
+
+import yaml
+
+from kevinlulee.serializers import FORMATS, toml_loads, toml_dumps
+
+
+def sample(records):
+    return {
+        "items": [
+            {
+                "id": i,
+                "name": f"item-{i}",
+                "price": i * 1.25,
+                "active": i % 2 == 0,
+                "tags": ["alpha", "beta", "gamma"],
+            }
+            for i in range(records)
+        ]
+    }
+
+
+BASELINES = {
+    "json": (json.loads, lambda d: json.dumps(d, indent=2)),
+    "yaml": (yaml.safe_load, lambda d: yaml.dump(d, indent=2)),
+    "toml": (toml_loads, toml_dumps),
+}
+
+
+def throughput(fn, arg, size):
+    start = time.perf_counter()
+    fn(arg)
+    elapsed = time.perf_counter() - start
+    return size / elapsed / 1e6
+
+
+def main(records):
+    data = sample(records)
+    print(f"{'format':<6} {'backend':<10} {'parse MB/s':>12} {'dump MB/s':>12}")
+    for ext, (base_loads, base_dumps) in BASELINES.items():
+        serializer = FORMATS[ext]
+        text = serializer.dumps(data)
+        size = len(text.encode())
+        payload = text.encode() if serializer.binary else text
+
+        rows = [
+            (serializer.name, serializer.loads, payload, serializer.dumps),
+            ("baseline", base_loads, text, base_dumps),
+        ]
+        for name, loads, source, dumps in rows:
+            parse = throughput(loads, source, size)
+            dump = throughput(dumps, data, size)
+            print(f"{ext:<6} {name:<10} {parse:>12.1f} {dump:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
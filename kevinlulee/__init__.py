@@ -11,6 +11,11 @@ from .typstfmt import typstfmt
 from .bash import bash, typst, python3
 from .ripgrep import ripgrep, fdfind, fd
 from .git import GitRepo
+from .git_fleet import GitFleet
+from .dirsync import sync_directory
+from .serializers import register_format
+from .dedupe import find_duplicates
+from .snapshot import DirectorySnapshot
 
 
 import inspect
@@ -0,0 +1,100 @@
+import os
+import hashlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from kevinlulee.file_utils import hash_file, walkfiles
+
+EDGE_SIZE = 64 * 1024
+
+
+def partial_hash(path, size, edge=EDGE_SIZE):
+    """Hashes the first and last `edge` bytes of a file.
+    For files no larger than 2 * edge this covers the whole file.
+    """
+    h = hashlib.blake2b()
+    with open(path, "rb") as f:
+        h.update(f.read(edge))
+        if size > 2 * edge:
+            f.seek(-edge, os.SEEK_END)
+        h.update(f.read(edge))
+    return h.hexdigest()
+
+
+def _group_by_hash(pool, candidates, hasher):
+    groups = defaultdict(list)
+    keys = [(size, path) for size, paths in candidates.items() for path in paths]
+    for (size, path), digest in zip(keys, pool.map(lambda key: hasher(key[1], key[0]), keys)):
+        if digest is not None:
+            groups[(size, digest)].append(path)
+    return {key: paths for key, paths in groups.items() if len(paths) > 1}
+
+
+def _safe(hasher):
+    def inner(path, size):
+        try:
+            return hasher(path, size)
+        except OSError:
+            return None
+
+    return inner
+
+
+def find_duplicates(dirs, pattern=".", min_size=1, workers=8, ignore_dirs=None):
+    """Finds files with identical contents.
+
+    Files are bucketed by size first, so files with a unique size are never
+    opened. Same-size files are then compared by a hash of their first and
+    last 64 KB, and only the files that still collide are hashed in full
+    (blake2b, on a thread pool). Hard links to the same inode count once.
+
+    Args:
+        dirs: A directory or a list of directories.
+        pattern: A regex that file paths must match.
+        min_size: Files smaller than this are ignored. Empty files are
+                  ignored by default.
+        workers: The number of hashing threads.
+        ignore_dirs: Directory names to skip, see `walkfiles`.
+
+    Returns:
+        A dict with "groups", a list of duplicate groups (sorted lists of
+        paths, largest reclaimable space first), and "reclaimable", the bytes
+        freed by keeping one file per group.
+    """
+    dirs = [dirs] if isinstance(dirs, str) else dirs
+
+    by_size = defaultdict(list)
+    seen = set()
+    for dir in dirs:
+        for path, st in walkfiles(dir, pattern=pattern, stat=True, ignore_dirs=ignore_dirs):
+            if st.st_size < min_size:
+                continue
+            inode = (st.st_dev, st.st_ino)
+            if inode in seen:
+                continue
+            seen.add(inode)
+            by_size[st.st_size].append(path)
+
+    candidates = {size: paths for size, paths in by_size.items() if len(paths) > 1}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        partial = _group_by_hash(pool, candidates, _safe(partial_hash))
+
+        # small files were read whole by the partial hash, so their groups are final
+        groups = [paths for (size, _), paths in partial.items() if size <= 2 * EDGE_SIZE]
+        survivors = defaultdict(list)
+        for (size, _), paths in partial.items():
+            if size > 2 * EDGE_SIZE:
+                survivors[size].extend(paths)
+
+        full = _group_by_hash(pool, survivors, _safe(lambda path, size: hash_file(path)))
+        groups += full.values()
+
+    sizes = {path: size for size, paths in candidates.items() for path in paths}
+    groups = sorted(
+        (sorted(paths) for paths in groups),
+        key=lambda paths: sizes[paths[0]] * (len(paths) - 1),
+        reverse=True,
+    )
+    reclaimable = sum(sizes[paths[0]] * (len(paths) - 1) for paths in groups)
+    return {"groups": groups, "reclaimable": reclaimable}
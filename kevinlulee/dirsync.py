@@ -0,0 +1,133 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from kevinlulee.file_utils import FilepathValidator, fastcopy, hash_file
+
+
+def is_unchanged(source, dest, checksum=False, source_stat=None):
+    """Checks whether dest already holds the same file as source.
+
+    Files match when their sizes are equal and their mtimes agree to the
+    second (rsync's default). With checksum=True, same-size files are
+    compared by content hash instead of mtime. Pass source_stat to reuse
+    a stat result the caller already has.
+    """
+    try:
+        dest_stat = os.stat(dest)
+    except OSError:
+        return False
+
+    if source_stat is None:
+        source_stat = os.stat(source)
+
+    if dest_stat.st_size != source_stat.st_size:
+        return False
+
+    if checksum:
+        return hash_file(source) == hash_file(dest)
+
+    return int(dest_stat.st_mtime) == int(source_stat.st_mtime)
+
+
+def _walk_tree(src, dest, validate, make_directory):
+    """Yields (path, stat) for the files under src, following symlinked
+    directories like `shutil.copytree` does. Empty directories are
+    recreated under dest as they are found.
+    """
+    seen = set()
+    for dirpath, dirnames, filenames in os.walk(src, followlinks=True):
+        st = os.stat(dirpath)
+        if (st.st_dev, st.st_ino) in seen:
+            # a symlink loop
+            dirnames[:] = []
+            continue
+        seen.add((st.st_dev, st.st_ino))
+
+        dirnames[:] = [name for name in dirnames if validate.directory(name)]
+        if not dirnames and not filenames:
+            make_directory(os.path.join(dest, os.path.relpath(dirpath, src)))
+
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            if not validate.file(path):
+                continue
+            try:
+                yield path, os.stat(path)
+            except OSError:
+                # a dangling symlink
+                continue
+
+
+def sync_directory(src, dest, checksum=False, workers=8, pattern=".", ignore_dirs=None):
+    """Makes dest contain every file under src, copying only what changed.
+
+    Files whose size and mtime already match at the destination are
+    skipped, so re-running a sync over an unchanged tree only costs a stat
+    per file. Changed files are copied on a thread pool with `fastcopy`,
+    which preserves mtimes for the next comparison. Nothing is deleted
+    from dest. Symlinked directories are copied as real directories and
+    empty directories are recreated.
+
+    Args:
+        src: The source directory.
+        dest: The destination directory. Created if missing.
+        checksum: If True, compare same-size files by content hash.
+        workers: The number of copy threads.
+        pattern: A regex that source paths must match to be synced.
+        ignore_dirs: Directory names to leave out. Nothing is left out by default.
+
+    Returns:
+        A dict with files_copied, files_skipped, bytes_copied, bytes_skipped,
+        seconds and throughput (bytes copied per second).
+    """
+    src = os.path.expanduser(src)
+    dest = os.path.expanduser(dest)
+    if not os.path.isdir(src):
+        raise FileNotFoundError(f"Source directory '{src}' does not exist or is not a directory")
+
+    start = time.perf_counter()
+    created = set()
+    lock = threading.Lock()
+
+    def make_directory(directory):
+        with lock:
+            if directory not in created:
+                os.makedirs(directory, exist_ok=True)
+                created.add(directory)
+
+    report = {
+        "files_copied": 0,
+        "files_skipped": 0,
+        "bytes_copied": 0,
+        "bytes_skipped": 0,
+    }
+
+    def sync(item):
+        source, source_stat = item
+        target = os.path.join(dest, os.path.relpath(source, src))
+
+        if is_unchanged(source, target, checksum=checksum, source_stat=source_stat):
+            with lock:
+                report["files_skipped"] += 1
+                report["bytes_skipped"] += source_stat.st_size
+            return
+
+        make_directory(os.path.dirname(target))
+        size = fastcopy(source, target)
+        with lock:
+            report["files_copied"] += 1
+            report["bytes_copied"] += size
+
+    validate = FilepathValidator(pattern=pattern, ignore_dirs=ignore_dirs or [])
+    make_directory(dest)
+    files = _walk_tree(src, dest, validate, make_directory)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in pool.map(sync, files):
+            pass
+
+    seconds = time.perf_counter() - start
+    report["seconds"] = seconds
+    report["throughput"] = report["bytes_copied"] / seconds if seconds else 0.0
+    return report
@@ -4,14 +4,33 @@ import shutil
 from pathlib import Path
 import shutil
 import os
+import bz2
+import contextlib
+import copy
+import csv
+import errno
+import fnmatch
+import gzip
+import hashlib
+import heapq
 import json
+import lzma
+import mmap
+import re
+import stat
+import tempfile
+import threading
+import time
 import yaml
-import toml
-from typing import Any
+from typing import Any, Iterator
+from array import array
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pathlib import Path
 import shutil
 
 from kevinlulee.string_utils import mget
+from kevinlulee.serializers import YAML_LOADER, get_format
 
 
 EXT_REFERENCE_MAP = {
@@ -75,6 +94,65 @@ def is_extf(extensions):
     def check(el):
         return get_extension(el) in extensions
     return check
+COMPRESSION_EXTENSIONS = ("gz", "xz", "bz2", "zst")
+
+
+def get_compression(file_path: str) -> str | None:
+    """Returns the compression extension of a path (gz, xz, bz2 or zst), or None."""
+    ext = os.path.splitext(file_path)[1].lstrip(".").lower()
+    return ext if ext in COMPRESSION_EXTENSIONS else None
+
+
+def get_format_extension(file_path: str) -> str:
+    """Like `get_extension`, but looks through a compression suffix,
+    so "data.json.gz" gives "json". A compressed path with no extension
+    inside, e.g. "archive.gz", gives "": its format is unknown.
+    """
+    if get_compression(file_path):
+        inner = os.path.splitext(file_path)[0]
+        return get_extension(inner) if os.path.splitext(inner)[1] else ""
+    return get_extension(file_path)
+
+
+def open_file(path: str, mode: str = "r", **kwargs):
+    """Opens a file, transparently (de)compressing .gz, .xz, .bz2 and .zst paths.
+    Text modes stay text modes. zstandard is only needed for .zst files.
+    """
+    compression = get_compression(path)
+    if not compression:
+        return open(path, mode, **kwargs)
+
+    if "b" not in mode and "t" not in mode:
+        mode += "t"
+
+    if compression == "gz":
+        return gzip.open(path, mode, **kwargs)
+    if compression == "xz":
+        return lzma.open(path, mode, **kwargs)
+    if compression == "bz2":
+        return bz2.open(path, mode, **kwargs)
+
+    import zstandard
+
+    return zstandard.open(path, mode, **kwargs)
+
+
+def compress_bytes(path: str, value: bytes) -> bytes:
+    """Compresses value with the codec named by path's extension, if any."""
+    compression = get_compression(path)
+    if compression == "gz":
+        return gzip.compress(value)
+    if compression == "xz":
+        return lzma.compress(value)
+    if compression == "bz2":
+        return bz2.compress(value)
+    if compression == "zst":
+        import zstandard
+
+        return zstandard.ZstdCompressor().compress(value)
+    return value
+
+
 def get_extension(file_path: str) -> str:
     """Extracts and formats the file extension from a given file path.
        Files like .env and .vimrc will result in no extension.
@@ -92,87 +170,226 @@ def get_extension(file_path: str) -> str:
     return os.path.splitext(file_path)[1].lstrip(".").lower()
 
 
-def writefile(filepath: str, data: Any, debug = False) -> str:
-    """Writes data to a file, serializing it based on the file extension.
-    Creates the directory if it doesn't exist.
+def readfile(path: str, stream: bool = False, mapped: bool = False, cache: bool = False) -> Any:
+    """Reads a file and returns its content.
+    Supports JSON, YAML, TOML, and raw text/binary formats.
 
     Args:
-        filepath: The path to the file to write to. The path must have an extension.
-        data: The data to write to the file. Supported types include int, float, str,
-              bool, dict, and list. Data will be serialized to YAML, TOML, or JSON
-              format based on the file extension.
+        path: The path to the file.
+        stream: If True, return a lazy iterator of records instead of the
+                fully parsed content. See `iterfile`.
+        mapped: If True, return a read-only memory map of the raw bytes
+                instead of reading them. See `mapfile`.
+        cache: If True, serve the parsed content from `parse_cache` while the
+               file's mtime and size are unchanged. Callers get their own copy.
 
     Returns:
-        The absolute path to the file that was written to.
+        The content of the file, deserialized if applicable.
+        Returns None if the file does not exist, except with stream=True,
+        which returns an empty iterator.
+    """
+    expanded_path = os.path.expanduser(path)
 
-    Raises:
-        ValueError: If the file extension is not supported or data is None.
-        TypeError: If the data cannot be serialized to the specified format.
-        AssertionError: If the data is None or has no value or if the file path
-                        does not have an extension.
+    if stream:
+        return iterfile(expanded_path)
+
+    if mapped:
+        return mapfile(expanded_path)
+
+    if not os.path.isfile(expanded_path):
+        # a json/yaml file may exist only as its append log
+        if (
+            os.path.isfile(get_appendlog_path(expanded_path))
+            and get_format_extension(expanded_path) in APPENDLOG_EXTENSIONS
+        ):
+            return merge_appendlog(expanded_path, None)
+        return None
+
+    if cache:
+        return parse_cache.read(expanded_path)
+
+    extension = get_format_extension(expanded_path)
+    if not extension and get_compression(expanded_path):
+        raise ValueError(f"Unknown format: {expanded_path} has no extension before its compression suffix")
+    serializer = get_format(extension)
+    binary = extension in ("img", "jpg", "jpeg", "png", "gif", "svg") or (serializer and serializer.binary)
+    with open_file(expanded_path, "rb" if binary else "r") as f:
+        if not serializer or not serializer.loads:
+            return f.read()
+        p = serializer.load(f)
+
+    if extension in ("yaml", "yml") and isinstance(p, str):  # wasnt able to parse the input
+        return None
+    if extension in APPENDLOG_EXTENSIONS:
+        return merge_appendlog(expanded_path, p)
+    return p
+
+
+class ParseCache:
+    """An in-process LRU cache of parsed files, used by `readfile(path, cache=True)`.
+
+    Entries are keyed on (path, st_mtime_ns, st_size), plus the same for the
+    file's append log, so an edited file is re-parsed on its next read.
+    The cache is bounded by the total on-disk size of the cached files.
+    Mutable results are deep-copied on the way out, so callers can never
+    modify the cached value.
+
+    Attributes:
+        max_bytes: The byte budget. The least recently used entries are
+                   evicted once it is exceeded.
+        hits: The number of reads served from the cache.
+        misses: The number of reads that had to parse the file.
     """
-    assert data, "Data must be existant. Empty strings or None are not allowed."
-    assert os.path.splitext(filepath)[1], f"Filepath must have an extension: {filepath}"
 
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def read(self, path: str) -> Any:
+        path = os.path.expanduser(path)
+        key = self._key(path)
+        if key is None:
+            return readfile(path)
+
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and entry[0] == key:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return _protect(entry[1])
+            self.misses += 1
+
+        value = readfile(path)
+        size = key[1] + key[3]
+        with self.lock:
+            self._discard(path)
+            if size <= self.max_bytes:
+                self.entries[path] = (key, value, size)
+                self.size += size
+                while self.size > self.max_bytes:
+                    self._discard(next(iter(self.entries)))
+        return _protect(value)
+
+    def invalidate(self, path: str | None = None) -> None:
+        """Drops the entry for path, or every entry if path is None."""
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+                self.size = 0
+            else:
+                self._discard(os.path.expanduser(path))
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _discard(self, path):
+        entry = self.entries.pop(path, None)
+        if entry:
+            self.size -= entry[2]
+
+    def _key(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        try:
+            log = os.stat(get_appendlog_path(path))
+            log_key = (log.st_mtime_ns, log.st_size)
+        except OSError:
+            log_key = (0, 0)
+        return (st.st_mtime_ns, st.st_size, *log_key)
+
+
+def _protect(value):
+    if isinstance(value, (dict, list, set)):
+        return copy.deepcopy(value)
+    return value
+
+
+parse_cache = ParseCache()
+
+
+def iterfile(path: str) -> Iterator[Any]:
+    """Lazily yields the records of a file one at a time.
+    Only one record is held in memory at once, regardless of file size.
+
+    Records by extension:
+        jsonl, ndjson: one parsed object per non-blank line.
+        yaml, yml: one parsed document per `---` separated document.
+        csv: one dict per row, keyed by the header row.
+        anything else: one line of text at a time.
 
-    def serialize(data: Any) -> str:
-        if isinstance(data, (int, bool)):
-            raise TypeError("Only strings, arrays, dictionaries, customs are allowed.")
-        elif isinstance(data, str):
-            return data
-
-        elif isinstance(data, (dict, list, tuple)):
-            file_extension = get_extension(filepath)
-            match file_extension:
-                case 'yb':
-                    import yb
-                    return yb.dumps(data)
-                case "yml" | "yaml":
-                    return yaml.dumps(data, indent=2)
-                case "toml":
-                    import toml
-
-                    return toml.dumps(data)
-                case "json":
-                    return json.dumps(data, indent=2)
-                case "txt":
-                    return json.dumps(data, indent=2)
-                case _:
-                    raise ValueError(f"Unsupported file extension: {file_extension}")
+    Args:
+        path: The path to the file.
+
+    Yields:
+        The parsed records. Yields nothing if the file does not exist.
+    """
+    expanded_path = os.path.expanduser(path)
+
+    if not os.path.isfile(expanded_path):
+        return
+
+    extension = get_format_extension(expanded_path)
+
+    with open_file(expanded_path, "r", newline="" if extension == "csv" else None) as f:
+        if extension in ("jsonl", "ndjson"):
+            loads = get_format("json").loads
+            for line in f:
+                if line.strip():
+                    yield loads(line)
+        elif extension in ("yaml", "yml"):
+            for document in yaml.load_all(f, Loader=YAML_LOADER):
+                if document is not None:
+                    yield document
+        elif extension == "csv":
+            yield from csv.DictReader(f)
         else:
-            return str(data)
+            yield from f
 
-    expanded_file_path = os.path.expanduser(filepath)
-    dir_path = os.path.dirname(expanded_file_path)
 
-    value = serialize(data)
-    if debug:
-        print('-' * 20)
-        print('[DEBUGGING] writefile')
-        print(f'[PATH] "{expanded_file_path}"')
-        print('[CONTENT]')
-        print()
-        print(value)
-        print('-' * 20)
-        print()
-    else:
-        if dir_path and not os.path.exists(dir_path):
-            os.makedirs(dir_path, exist_ok=True)
-        with open(expanded_file_path, "w") as file:
-            file.write(value)
+class EmptyMap(bytes):
+    """Stands in for the mmap of an empty file, which cannot be mapped.
+    It is b"" and, like an mmap, a context manager with a no-op `close`.
+    """
 
-    return expanded_file_path
+    def close(self):
+        pass
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
 
-def readfile(path: str) -> Any:
-    """Reads a file and returns its content.
-    Supports JSON, YAML, TOML, and raw text/binary formats.
+
+def mapfile(path: str) -> mmap.mmap | EmptyMap | None:
+    """Memory-maps a file read-only instead of copying it into memory.
+
+    The returned map can be sliced (`m[10:20]` returns bytes), wrapped in a
+    `memoryview` for zero-copy slicing, and searched directly with bytes
+    regexes (`re.search(rb"...", m)`). Pages are only read from disk when
+    they are touched. Use it as a context manager, or call `.close()`,
+    to release the mapping.
 
     Args:
         path: The path to the file.
 
     Returns:
-        The content of the file, deserialized if applicable.
+        A read-only mmap of the file contents.
+        Returns an empty `EmptyMap` (equal to b"") for empty files,
+        which cannot be mapped.
         Returns None if the file does not exist.
     """
     expanded_path = os.path.expanduser(path)
@@ -180,72 +397,138 @@ def readfile(path: str) -> Any:
     if not os.path.isfile(expanded_path):
         return None
 
-    extension = get_extension(expanded_path)
+    with open(expanded_path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return EmptyMap()
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
 
-    mode = "rb" if extension in ("img", "jpg", "jpeg", "png", "gif", "svg") else "r"
-    with open(expanded_path, mode) as f:
-        if extension == "json":
-            return json.load(f)
-        if extension == "yb":
-            return yb.load(f)
-        elif extension in ("yaml", "yml"):
-            p = yaml.safe_load(f)
-            if isinstance(p, str):  # wasnt able to parse the input
-                return None
-            return p
-        elif extension == "toml":
-            return toml.load(f)
-        else:
-            return f.read()
+_ROOT_MARKERS = {}
+
+
+def _has_root_marker(directory, kind):
+    """Checks a directory for a .git (kind="git") or for a .git directory or
+    *.egg-info (kind="project"). Answers are cached until the directory's
+    mtime changes, which it does whenever an entry is added or removed.
+    """
+    try:
+        st = os.stat(directory)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(st.st_mode):
+        return False
+
+    key = (kind, directory)
+    cached = _ROOT_MARKERS.get(key)
+    if cached and cached[0] == st.st_mtime_ns:
+        return cached[1]
+
+    if kind == "git":
+        marked = os.path.exists(os.path.join(directory, ".git"))
+    else:
+        entries = os.listdir(directory)
+        marked = (
+            ".git" in entries and os.path.isdir(os.path.join(directory, ".git"))
+        ) or any(entry.endswith(".egg-info") for entry in entries)
+
+    _ROOT_MARKERS[key] = (st.st_mtime_ns, marked)
+    return marked
+
+
+def _resolve_root(start, kind, limit, memo, stop_at=None):
+    current = start
+    visited = []
+    for _ in range(limit):
+        if current in memo:
+            root = memo[current]
+            break
+        visited.append(current)
+        if _has_root_marker(current, kind):
+            root = current
+            break
+        parent = os.path.dirname(current)
+        if parent in (current, stop_at):
+            root = None
+            break
+        current = parent
+    else:
+        # ran out of levels; a shallower start might still succeed
+        return None
+
+    for directory in visited:
+        memo[directory] = root
+    return root
+
+
+def clear_root_cache():
+    """Forgets every cached .git / *.egg-info lookup."""
+    _ROOT_MARKERS.clear()
 
-import os
 
 def find_project_root(start_path):
     """
     Search upward from start_path for a directory containing .git or any *.egg-info.
     """
-    current_dir = os.path.expanduser(start_path)
+    return _resolve_root(os.path.expanduser(start_path), "project", 15, {})
 
-    count = 0
-    while count < 15:
-        count += 1
-        if os.path.isdir(os.path.join(current_dir, '.git')):
-            return current_dir
 
-        entries = os.listdir(current_dir) if os.path.isdir(current_dir) else []
-        if any(entry.endswith('.egg-info') for entry in entries):
-            return current_dir
+def find_git_directory(path):
+    return _resolve_root(os.path.expanduser(path), "git", 10, {}, stop_at=os.path.expanduser("~/"))
 
-        parent_dir = os.path.dirname(current_dir)
-        if parent_dir == current_dir:
-            break
 
-        current_dir = parent_dir
+def find_project_roots(paths):
+    """Resolves the project root of many paths at once.
+    Each distinct ancestor directory is examined at most once.
 
-    return None
+    Returns:
+        A dict mapping each given path to its root (or None).
+    """
+    memo = {}
+    return {path: _resolve_root(os.path.expanduser(path), "project", 15, memo) for path in paths}
 
-def find_git_directory(path):
-    root = os.path.expanduser("~/")
-    path = os.path.expanduser(path)
 
-    count = 0
-    while count < 10:
-        count += 1
-        if os.path.exists(os.path.join(path, ".git")):
-            return path
-        new_path = os.path.dirname(path)
-        if new_path in (root, path):
-            return 
-        path = new_path
-    return None
+def find_git_directories(paths):
+    """Like `find_project_roots`, for `find_git_directory`."""
+    memo = {}
+    stop_at = os.path.expanduser("~/")
+    return {
+        path: _resolve_root(os.path.expanduser(path), "git", 10, memo, stop_at=stop_at)
+        for path in paths
+    }
+
+_UNSET = object()
+
 
 class FileContext:
-    def __init__(self, file):
+    """Lazy metadata for one file. The file is stat-ed at most once and its
+    content, git directory and project root are computed on first access.
+    Call `refresh()` to pick up changes made on disk since then.
+    """
+
+    __slots__ = ("path", "_stat", "_content", "_git_directory", "_project_root")
+
+    def __init__(self, file, stat=None):
         self.path = os.path.expanduser(file)
+        self._stat = stat
+        self._content = _UNSET
+        self._git_directory = _UNSET
+        self._project_root = _UNSET
+
+    def refresh(self):
+        self._stat = None
+        self._content = _UNSET
+        self._git_directory = _UNSET
+        self._project_root = _UNSET
+        return self
+
+    @property
+    def stat(self):
+        if self._stat is None:
+            self._stat = os.stat(self.path)
+        return self._stat
 
     @property
     def size(self):
-        return os.path.getsize(self.path)
+        return self.stat.st_size
 
     @property
     def filename(self):
@@ -265,29 +548,142 @@ class FileContext:
 
     @property
     def content(self):
-        return readfile(self.path)
+        if self._content is _UNSET:
+            self._content = readfile(self.path)
+        return self._content
 
     @property
     def modified_at(self):
-        return os.path.getmtime(self.path)
+        return self.stat.st_mtime
 
     @property
     def git_directory(self):
-        return find_git_directory(self.path)
+        if self._git_directory is _UNSET:
+            self._git_directory = find_git_directory(self.path)
+        return self._git_directory
 
     @property
     def project_root(self):
-        return find_project_root(self.path)
+        if self._project_root is _UNSET:
+            self._project_root = find_project_root(self.path)
+        return self._project_root
+
+    @classmethod
+    def scan(cls, dir, pattern=".", recursive=True, workers=None):
+        """Collects the metadata of every file under dir in one scandir pass.
+
+        Returns:
+            A FileTable with one row per file.
+        """
+        table = FileTable()
+        for path, st in walkfiles(dir, pattern=pattern, recursive=recursive, stat=True, workers=workers):
+            table.append(path, st)
+        return table
+
+
+class FileTable:
+    """Columnar file metadata: a list of paths alongside packed int64 arrays
+    of sizes and mtimes (in nanoseconds). Built by `FileContext.scan`.
+    The scan's stat results are kept too, so `context` never stats again.
+    """
+
+    __slots__ = ("paths", "sizes", "mtimes", "stats")
+
+    def __init__(self):
+        self.paths = []
+        self.sizes = array("q")
+        self.mtimes = array("q")
+        self.stats = []
+
+    def append(self, path, st):
+        self.paths.append(path)
+        self.stats.append(st)
+        self.sizes.append(st.st_size)
+        self.mtimes.append(st.st_mtime_ns)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __getitem__(self, i):
+        return {
+            "path": self.paths[i],
+            "size": self.sizes[i],
+            "modified_at": self.mtimes[i] / 1e9,
+        }
+
+    def __iter__(self):
+        for i in range(len(self.paths)):
+            yield self[i]
+
+    @property
+    def total_size(self):
+        return sum(self.sizes)
+
+    def context(self, i):
+        return FileContext(self.paths[i], stat=self.stats[i])
+
+
 def get_most_recent_file(directory, pattern="*"):
-    # Get a list of files in the directory that match the pattern
-    import glob
-    files = glob.glob(os.path.join(os.path.expanduser(directory), pattern))
-    
-    if not files:
-        return None
-    
-    most_recent = max(files, key=os.path.getmtime)
-    return most_recent
+    files = most_recent_files(directory, pattern=pattern, k=1)
+    return files[0] if files else None
+
+
+def most_recent_files(dirs, pattern="*", k=1, recursive=False, since=None) -> list[str]:
+    """Finds the k most recently modified files across one or more directories.
+
+    The mtimes come from the scandir pass itself and only the current top k
+    are kept, so the cost is one pass over the directories regardless of k.
+
+    Args:
+        dirs: A directory or a list of directories.
+        pattern: A glob matched against each file name. When the pattern
+                 contains a "/", it is matched like glob against the path
+                 relative to its root, one component per directory level,
+                 and subdirectories are searched. Like glob, "*" does not
+                 match dotfiles.
+        k: The number of files to return. None returns every match.
+        recursive: If True, descend into subdirectories.
+        since: Keyword arguments for `date_utils.is_recentf`, e.g. {"hours": 1}.
+               Only files modified after that cutoff are considered.
+
+    Returns:
+        File paths, most recent first.
+    """
+    from kevinlulee.date_utils import is_recentf
+
+    dirs = [dirs] if isinstance(dirs, str) else dirs
+    is_recent = is_recentf(**since) if since else None
+    parts = pattern.split("/")
+
+    def matches(names):
+        if len(names) != len(parts):
+            return False
+        for name, part in zip(names, parts):
+            if name.startswith(".") and not part.startswith("."):
+                return False
+            if not fnmatch.fnmatch(name, part):
+                return False
+        return True
+
+    def candidates():
+        for dir in dirs:
+            root = os.path.expanduser(dir)
+            for path, st in walkfiles(root, recursive=recursive or len(parts) > 1, stat=True):
+                if len(parts) > 1:
+                    names = os.path.relpath(path, root).split(os.sep)
+                else:
+                    names = [os.path.basename(path)]
+                if not matches(names):
+                    continue
+                if is_recent and not is_recent(st.st_mtime):
+                    continue
+                yield st.st_mtime_ns, path
+
+    if k is None:
+        ranked = sorted(candidates(), reverse=True)
+    else:
+        ranked = heapq.nlargest(k, candidates())
+    return [path for _, path in ranked]
 
 def clip(s):
     file = os.path.expanduser('~/.kdog3682/scratch/clip.txt')
@@ -344,20 +740,16 @@ def symlink(source, destination, force = False):
         if os.path.lexists(destination):
              raise AssertionError(f"Destination path '{destination}' already exists. Use force=True to overwrite.")
 
-def copy_directory_contents(src, dest):
-    src = os.path.expanduser(src)
-    dest = os.path.expanduser(dest)
-    if not os.path.exists(dest):
-        os.makedirs(dest)
-    for item in os.listdir(src):
-        s = os.path.join(src, item)
-        d = os.path.join(dest, item)
-        if os.path.isdir(s):
-            shutil.copytree(s, d, dirs_exist_ok=True)
-        else:
-            shutil.copy2(s, d)
+def copy_directory_contents(src, dest, checksum=False, workers=8):
+    """Copies everything under src into dest, skipping files that are
+    already up to date. See `kevinlulee.dirsync.sync_directory`.
+
+    Returns:
+        The sync report.
+    """
+    from kevinlulee.dirsync import sync_directory
 
-        print('copied', s)
+    return sync_directory(src, dest, checksum=checksum, workers=workers)
 
 def resolve_dotted_path(path, reference):
 
@@ -399,6 +791,47 @@ def fnamemodify(file, dir = None, name = None, ext = None):
     return os.path.join(_dir, f"{_name}.{_ext}")
 
 
+def fastcopy(source, dest) -> int:
+    """Copies a file's contents and metadata (like `shutil.copy2`),
+    letting the kernel move the bytes.
+
+    Uses `os.copy_file_range` where available, which also allows
+    filesystems to share blocks (reflinks). Otherwise falls back to
+    `shutil.copy2`, which uses `os.sendfile` on Linux.
+
+    Returns:
+        The number of bytes copied.
+    """
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(source, "rb") as fsrc, open(dest, "wb") as fdst:
+                size = os.fstat(fsrc.fileno()).st_size
+                copied = 0
+                while True:
+                    n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), 1 << 30)
+                    if n == 0:
+                        break
+                    copied += n
+            if copied == size:
+                shutil.copystat(source, dest)
+                return copied
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.EPERM):
+                raise
+
+    shutil.copy2(source, dest)
+    return os.path.getsize(dest)
+
+
+def hash_file(path, algorithm="blake2b", chunk_size=1024 * 1024) -> str:
+    """Returns the hex digest of a file, reading it in chunks."""
+    h = hashlib.new(algorithm)
+    with open(os.path.expanduser(path), "rb") as f:
+        while chunk := f.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
 def cpfile(source, dest, debug=False):
     source = os.path.abspath(os.path.expanduser(source))
     dest = os.path.abspath(os.path.expanduser(dest))
@@ -415,6 +848,81 @@ def cpfile(source, dest, debug=False):
     shutil.copy2(source, dest)
 
 
+def cpfiles(pairs, workers=8, verify=False, debug=False) -> dict:
+    """Copies many files concurrently, like calling `cpfile` on each pair.
+
+    Destination directories are created once each, and files are copied
+    on a thread pool with `fastcopy`. With verify=True each copy is
+    re-read and compared to its source by streaming hash.
+
+    Args:
+        pairs: (source, dest) pairs, or a dict of source to dest. A dest that
+               is an existing directory receives the file under its own name.
+        workers: The number of copy threads.
+        verify: If True, hash source and copy and record whether they match.
+        debug: If True, print the planned copies without copying.
+
+    Returns:
+        A dict with "files", one {"source", "dest", "bytes", "seconds",
+        "verified", "error"} dict per pair, plus the total "bytes",
+        "seconds" and "throughput" (bytes copied per second). With
+        debug=True, the planned pairs with nothing copied.
+    """
+    if isinstance(pairs, dict):
+        pairs = pairs.items()
+
+    is_directory = {}
+    targets = []
+    for source, dest in pairs:
+        source = os.path.abspath(os.path.expanduser(source))
+        dest = os.path.abspath(os.path.expanduser(dest))
+        assert os.path.isfile(source), f"the provided source: {source} is not a file"
+
+        if dest not in is_directory:
+            is_directory[dest] = os.path.isdir(dest)
+        if is_directory[dest]:
+            dest = os.path.join(dest, os.path.basename(source))
+        targets.append((source, dest))
+
+    def new_entry(source, dest):
+        return {"source": source, "dest": dest, "bytes": 0, "seconds": 0.0, "verified": None, "error": None}
+
+    if debug:
+        for source, dest in targets:
+            print(f"[cpfiles] Would copy:\n  from: {source}\n    to: {dest}")
+        files = [new_entry(source, dest) for source, dest in targets]
+        return {"files": files, "bytes": 0, "seconds": 0.0, "throughput": 0.0}
+
+    for directory in {os.path.dirname(dest) for _, dest in targets}:
+        os.makedirs(directory, exist_ok=True)
+
+    def copy(target):
+        source, dest = target
+        result = new_entry(source, dest)
+        start = time.perf_counter()
+        try:
+            result["bytes"] = fastcopy(source, dest)
+            if verify:
+                result["verified"] = hash_file(source) == hash_file(dest)
+        except OSError as e:
+            result["error"] = str(e)
+        result["seconds"] = time.perf_counter() - start
+        return result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        files = list(pool.map(copy, targets))
+    seconds = time.perf_counter() - start
+
+    total = sum(entry["bytes"] for entry in files)
+    return {
+        "files": files,
+        "bytes": total,
+        "seconds": seconds,
+        "throughput": total / seconds if seconds else 0.0,
+    }
+
+
 def resolve_filetype(filepath):
     ext = os.path.splitext(filepath)[1].lower()
     return {
@@ -472,6 +980,29 @@ def comment(text, filepath):
     return formatter(text)
 
 
+def serialize_data(filepath: str, data: Any) -> str:
+    """Serializes data to a string based on the extension of filepath.
+    Strings pass through unchanged.
+
+    Raises:
+        ValueError: If the file extension is not supported.
+        TypeError: If data is an int or bool.
+    """
+    if isinstance(data, (int, bool)):
+        raise TypeError("Only strings, arrays, dictionaries, customs are allowed.")
+    elif isinstance(data, str):
+        return data
+
+    elif isinstance(data, (dict, list, tuple)):
+        file_extension = get_format_extension(filepath)
+        serializer = get_format(file_extension)
+        if not serializer or not serializer.dumps:
+            raise ValueError(f"Unsupported file extension: {file_extension}")
+        return serializer.dumps(data)
+    else:
+        return str(data)
+
+
 def writefile(filepath: str, data: Any, debug = False, verbose = True) -> str:
     """Writes data to a file, serializing it based on the file extension.
     Creates the directory if it doesn't exist.
@@ -495,34 +1026,10 @@ def writefile(filepath: str, data: Any, debug = False, verbose = True) -> str:
     assert os.path.splitext(filepath)[1], f"Filepath must have an extension: {filepath}"
 
 
-    def serialize(data: Any) -> str:
-        if isinstance(data, (int, bool)):
-            raise TypeError("Only strings, arrays, dictionaries, customs are allowed.")
-        elif isinstance(data, str):
-            return data
-
-        elif isinstance(data, (dict, list, tuple)):
-            file_extension = get_extension(filepath)
-            match file_extension:
-                case "yml" | "yaml":
-                    return yaml.dump(data, indent=2)
-                case "toml":
-                    import toml
-
-                    return toml.dumps(data)
-                case "json":
-                    return json.dumps(data, indent=2)
-                case "txt":
-                    return json.dumps(data, indent=2)
-                case _:
-                    raise ValueError(f"Unsupported file extension: {file_extension}")
-        else:
-            return str(data)
-
     expanded_file_path = os.path.expanduser(filepath)
     dir_path = os.path.dirname(expanded_file_path)
 
-    value = serialize(data)
+    value = serialize_data(filepath, data)
     if debug:
         if verbose:
             print('-' * 20)
@@ -538,14 +1045,196 @@ def writefile(filepath: str, data: Any, debug = False, verbose = True) -> str:
     else:
         if dir_path and not os.path.exists(dir_path):
             os.makedirs(dir_path, exist_ok=True)
-        with open(expanded_file_path, "w") as file:
+        with open_file(expanded_file_path, "w") as file:
             file.write(value)
+        _discard_appendlog(expanded_file_path)
 
     return expanded_file_path
 
-def appendfile(path, data, debug = False):
+
+def atomic_write(path: str, value: str | bytes, fsync: bool = False, mode: int | None = None) -> int:
+    """Writes value to a temp file next to path, then renames it over path.
+    Readers see either the old file or the new one, never a partial write.
+    The parent directory must already exist.
+
+    Args:
+        path: The destination path.
+        value: The content. Strings are encoded as utf-8.
+        fsync: If True, flush the file to disk before the rename.
+        mode: Permission bits for the new file. Defaults to those of the file
+              being replaced, or 0o666 minus the umask for a new file.
+
+    Returns:
+        The number of bytes written.
+    """
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+    if mode is None:
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)
+        except FileNotFoundError:
+            mode = 0o666 & ~_UMASK
+
+    dir_path, name = os.path.split(path)
+    fd, tmp = tempfile.mkstemp(dir=dir_path or ".", prefix=f".{name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(value)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+    return len(value)
+
+
+def _get_umask() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# read once: os.umask can only be read by setting it, which races with other threads
+_UMASK = _get_umask()
+
+
+def fsync_directory(path: str) -> None:
+    """Flushes a directory entry table to disk, making prior renames durable."""
+    fd = os.open(path or ".", os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def writefiles(files: dict[str, Any], workers: int = 8, fsync: bool = False) -> list[dict]:
+    """Writes many files at once, serializing each one by its extension.
+
+    Each distinct directory is created once up front. Files are serialized
+    and written on a thread pool, each through a temp file plus `os.replace`,
+    so a crash never leaves a half-written target behind.
+
+    Args:
+        files: A mapping of filepath to data, as accepted by `writefile`.
+        workers: The number of writer threads.
+        fsync: If True, every file is fsynced before its rename, and each
+               parent directory is fsynced once after all renames are done.
+
+    Returns:
+        A list of {"path", "bytes", "seconds"} dicts, one per file, in the
+        order of `files`.
+
+    Raises:
+        AssertionError: If any data is empty or any path has no extension.
+                        Nothing is written in that case.
+    """
+    targets = []
+    for filepath, data in files.items():
+        assert data, f"Data must be existant. Empty strings or None are not allowed: {filepath}"
+        assert os.path.splitext(filepath)[1], f"Filepath must have an extension: {filepath}"
+        targets.append((os.path.expanduser(filepath), data))
+
+    directories = {os.path.dirname(path) for path, _ in targets}
+    for dir_path in directories:
+        if dir_path:
+            os.makedirs(dir_path, exist_ok=True)
+
+    def write(target):
+        path, data = target
+        start = time.perf_counter()
+        value = compress_bytes(path, serialize_data(path, data).encode("utf-8"))
+        size = atomic_write(path, value, fsync=fsync)
+        _discard_appendlog(path)
+        return {"path": path, "bytes": size, "seconds": time.perf_counter() - start}
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(write, targets))
+
+    if fsync:
+        for dir_path in directories:
+            fsync_directory(dir_path)
+
+    return results
+
+APPENDLOG_EXTENSIONS = ("json", "yml", "yaml")
+
+
+def get_appendlog_path(path: str) -> str:
+    """Returns the JSONL sidecar log that `appendfile(..., log=True)` writes to."""
+    return os.path.expanduser(path) + ".log.jsonl"
+
+
+def _discard_appendlog(path):
+    # a full write replaces the content, so pending appended records are stale
+    if get_format_extension(path) in APPENDLOG_EXTENSIONS:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(get_appendlog_path(path))
+
+
+def merge_appendlog(path: str, prev: Any) -> Any:
+    """Applies the pending records of path's append log on top of prev.
+    Lists are extended and dicts are updated, exactly like `appendfile`.
+    Returns prev untouched when there is no log.
+    """
+    logpath = get_appendlog_path(path)
+    if not os.path.isfile(logpath):
+        return prev
+
+    for record in iterfile(logpath):
+        if prev is None:
+            prev = [] if isinstance(record, list) else {}
+        prev.extend(record) if isinstance(record, list) else prev.update(record)
+    return prev
+
+
+def _dump_appended(path, payload):
+    if get_format_extension(path) == "json":
+        value = json.dumps(payload, indent=4, ensure_ascii=False)
+    else:
+        value = yaml.dump(payload, indent=2)
+    atomic_write(path, compress_bytes(path, value.encode("utf-8")))
+
+
+def compact_appendfile(path: str) -> str:
+    """Folds the append log of a JSON/YAML file into the file itself
+    and removes the log.
+
+    Returns:
+        The path of the canonical file.
+    """
+    path = os.path.expanduser(path)
+    logpath = get_appendlog_path(path)
+    if not os.path.isfile(logpath):
+        return path
+
+    _dump_appended(path, readfile(path))
+    os.remove(logpath)
+    return path
+
+
+def appendfile(path, data, debug = False, log = False, compact_after = None):
+    """Appends data to a file.
+
+    For JSON and YAML files, list data extends the stored list and dict
+    data updates the stored dict. By default that rewrites the whole file.
+    With log=True the data is instead appended as one line to a JSONL
+    sidecar log (see `get_appendlog_path`), which costs O(1) per call.
+    `readfile` merges the log transparently, and `compact_appendfile`
+    folds it back into the file.
+
+    Args:
+        path: The file to append to.
+        data: The data to append.
+        log: If True, append JSON/YAML data to the sidecar log.
+        compact_after: With log=True, compact once the log reaches this
+                       many bytes.
+    """
     path = os.path.expanduser(path)
-    e = get_extension(path)
+    e = get_format_extension(path)
 
     def get(path, data):
         as_array = isinstance(data, (list, tuple))
@@ -553,17 +1242,23 @@ def appendfile(path, data, debug = False):
         prev.extend(data) if as_array else prev.update(data)
         return prev
 
-    if e == "json":
-        payload = get(path, data)
-        with open(path, "w") as f:
-            json.dump(payload, f, indent=4, ensure_ascii=False)
+    if log and e in APPENDLOG_EXTENSIONS:
+        assert isinstance(data, (list, tuple, dict)), "Only arrays and dictionaries can be appended to the log."
+        logpath = get_appendlog_path(path)
+        with open(logpath, "a") as f:
+            f.write(json.dumps(data, ensure_ascii=False) + "\n")
+
+        if compact_after and os.path.getsize(logpath) >= compact_after:
+            compact_appendfile(path)
 
-    elif e == "yml":
+    elif e in APPENDLOG_EXTENSIONS:
         payload = get(path, data)
-        yaml.dump(path, payload)
+        # readfile already merged any pending log into the payload
+        _dump_appended(path, payload)
+        _discard_appendlog(path)
 
     else:
-        with open(path, "a") as f:
+        with open_file(path, "a") as f:
             if e == "yml.txt" and not is_string(data):
                 dashes = hr(20) + "\n"
                 if is_object(data):
@@ -584,11 +1279,13 @@ class FilepathValidator:
         ".git",
     ]
 
-    def __init__(self, pattern="."):
+    def __init__(self, pattern=".", ignore_dirs=None):
         self.regex = re.compile(pattern)
+        if ignore_dirs is not None:
+            self.ignore_dirs = ignore_dirs
 
     def directory(self, name):
-        if name in self.ignore_dirs or os.path.basename in self.ignore_dirs:
+        if name in self.ignore_dirs or os.path.basename(name) in self.ignore_dirs:
             return
         return True
 
@@ -597,36 +1294,194 @@ class FilepathValidator:
             return
         return True
 
-def getfiles(dir, pattern=".", recursive=False, sort=False) -> list[str]:
-    validate = FilepathValidator(pattern=pattern)
-    dir = os.path.expanduser(dir)
 
-    store = []
-    for root, dirs, files in os.walk(dir):
-        dirs[:] = [dir for dir in dirs if validate.directory(dir)]
+def _scan_directory(path, validate, stat):
+    files = []
+    subdirs = []
+    try:
+        it = os.scandir(path)
+    except OSError:
+        return files, subdirs
+
+    with it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                # like os.walk, symlinked directories are neither files nor descended into
+                if validate.directory(entry.path) and not entry.is_symlink():
+                    subdirs.append(entry.path)
+            elif validate.file(entry.path):
+                if stat:
+                    try:
+                        files.append((entry.path, entry.stat()))
+                    except OSError:
+                        continue
+                else:
+                    files.append(entry.path)
+
+    return files, subdirs
+
+
+def walkfiles(dir, pattern=".", recursive=True, stat=False, workers=None, ignore_dirs=None) -> Iterator:
+    """Lazily yields the files under dir whose path matches pattern.
 
-        for file in files:
-            path = os.path.join(root, file)
-            if validate.file(path):
-                store.append(path)
+    Built on `os.scandir`, so file types come from the directory listing
+    and ignored directories are pruned before they are ever opened.
 
-        if not recursive:
-            return store
+    Args:
+        dir: The directory to walk.
+        pattern: A regex searched against each full file path.
+        recursive: If False, only the files directly inside dir are yielded.
+        stat: If True, yield (path, os.stat_result) tuples instead of paths.
+        workers: If set, scan directories concurrently on this many threads.
+                 Results then arrive in completion order rather than walk order.
+        ignore_dirs: Directory names, or full directory paths, to skip.
+                     Defaults to FilepathValidator.ignore_dirs.
+
+    Yields:
+        File paths, or (path, stat_result) tuples when stat=True.
+    """
+    validate = FilepathValidator(pattern=pattern, ignore_dirs=ignore_dirs)
+    root = os.path.expanduser(dir)
 
+    if not recursive:
+        yield from _scan_directory(root, validate, stat)[0]
+        return
+
+    if not workers:
+        stack = [root]
+        while stack:
+            files, subdirs = _scan_directory(stack.pop(), validate, stat)
+            yield from files
+            stack.extend(reversed(subdirs))
+        return
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        pending = {pool.submit(_scan_directory, root, validate, stat)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                files, subdirs = future.result()
+                for subdir in subdirs:
+                    pending.add(pool.submit(_scan_directory, subdir, validate, stat))
+                yield from files
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def getfiles(dir, pattern=".", recursive=False, sort=False) -> list[str]:
+    store = list(walkfiles(dir, pattern=pattern, recursive=recursive))
+    if sort:
+        store.sort()
     return store
 
 
-def clear_directory(path):
-    dir_path = Path(path).expanduser()
-    if not dir_path.is_dir():
+def clear_directory(path, dry_run=False, workers=8, verbose=False):
+    """Deletes everything inside a directory, keeping the directory itself.
+
+    Deletion works relative to open directory descriptors (`dir_fd`), so
+    paths are never re-resolved and symlinks are removed, not followed.
+    Subdirectories and batches of top-level files are deleted in parallel.
+
+    Args:
+        path: The directory to clear.
+        dry_run: If True, count what would be deleted without deleting it.
+        workers: The number of deletion threads.
+        verbose: If True, print each top-level entry as it is deleted.
+
+    Returns:
+        A dict with the number of files and directories removed and the
+        bytes freed (the sum of the removed files' sizes).
+    """
+    dir_path = os.path.expanduser(str(path))
+    if not os.path.isdir(dir_path):
         raise ValueError(f"{path} is not a valid directory")
 
-    for item in dir_path.iterdir():
-        print('deleting', item.name)
-        if item.is_dir():
-            shutil.rmtree(item)
+    if not (os.unlink in os.supports_dir_fd and os.scandir in os.supports_fd):
+        return _clear_directory_by_path(dir_path, dry_run, verbose)
+
+    totals = {"files": 0, "directories": 0, "bytes": 0}
+    fd = os.open(dir_path, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        with os.scandir(fd) as it:
+            entries = list(it)
+
+        if verbose:
+            for entry in entries:
+                print('deleting', entry.name)
+
+        files = [e for e in entries if not e.is_dir(follow_symlinks=False)]
+        dirs = [e.name for e in entries if e.is_dir(follow_symlinks=False)]
+        batches = [files[i:i + 1024] for i in range(0, len(files), 1024)]
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_remove_tree_at, fd, name, dry_run) for name in dirs]
+            futures += [pool.submit(_unlink_entries_at, fd, batch, dry_run) for batch in batches]
+            for future in futures:
+                counts = future.result()
+                totals["files"] += counts[0]
+                totals["directories"] += counts[1]
+                totals["bytes"] += counts[2]
+    finally:
+        os.close(fd)
+
+    return totals
+
+
+def _unlink_entries_at(dir_fd, entries, dry_run):
+    counts = [0, 0, 0]
+    for entry in entries:
+        counts[0] += 1
+        counts[2] += entry.stat(follow_symlinks=False).st_size
+        if not dry_run:
+            os.unlink(entry.name, dir_fd=dir_fd)
+    return counts
+
+
+def _remove_tree_at(parent_fd, name, dry_run):
+    fd = os.open(name, os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW, dir_fd=parent_fd)
+    try:
+        with os.scandir(fd) as it:
+            entries = list(it)
+
+        counts = _unlink_entries_at(fd, [e for e in entries if not e.is_dir(follow_symlinks=False)], dry_run)
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                sub = _remove_tree_at(fd, entry.name, dry_run)
+                counts = [a + b for a, b in zip(counts, sub)]
+    finally:
+        os.close(fd)
+
+    if not dry_run:
+        os.rmdir(name, dir_fd=parent_fd)
+    counts[1] += 1
+    return counts
+
+
+def _clear_directory_by_path(dir_path, dry_run, verbose):
+    totals = {"files": 0, "directories": 0, "bytes": 0}
+    for item in Path(dir_path).iterdir():
+        if verbose:
+            print('deleting', item.name)
+        if item.is_dir() and not item.is_symlink():
+            for root, dirs, files in os.walk(item):
+                totals["directories"] += len(dirs)
+                totals["files"] += len(files)
+                totals["bytes"] += sum(os.lstat(os.path.join(root, f)).st_size for f in files)
+            totals["directories"] += 1
+            if not dry_run:
+                shutil.rmtree(item)
         else:
-            item.unlink()
+            totals["files"] += 1
+            totals["bytes"] += item.lstat().st_size
+            if not dry_run:
+                item.unlink()
+    return totals
  
 
 
@@ -637,42 +1492,106 @@ def is_dir(x):
     return x and os.path.isdir(os.path.expanduser(x))
 
 
-def mvdir(destination, source, force=False):
+def mvdir(destination, source, force=False, dry_run=False):
     """
     Move directory contents from source to destination.
-    
+
+    Entries on the same device as the destination are moved with a single
+    `os.rename`. Entries on another device are copied and then removed.
+    The (emptied) source directory itself is left in place.
+
     Args:
         destination (str): Path to destination directory
         source (str): Path to source directory
         force (bool, optional): If True, overwrite existing files at destination. Defaults to False.
-    
+        dry_run (bool, optional): If True, move nothing and return the plan instead.
+
     Returns:
         bool: True if operation was successful, False otherwise
+        list[dict]: With dry_run=True, the planned steps as
+                    {"action", "source", "destination"} dicts, where action is
+                    "rename", "copy", "merge", "skip", or "conflict" for a
+                    non-directory whose destination is a directory, which is
+                    left alone even with force.
     """
-    dest_path = Path(destination)
-    src_path = Path(source)
-    
+    dest_path = Path(destination).expanduser()
+    src_path = Path(source).expanduser()
+
     # Check if source exists
     if not src_path.exists() or not src_path.is_dir():
         raise FileNotFoundError(f"Source directory '{source}' does not exist or is not a directory")
-    
+
     # Create destination if it doesn't exist
-    dest_path.mkdir(parents=True, exist_ok=True)
-    
-    # Move files from source to destination
-    for item in src_path.glob('*'):
+    if not dry_run:
+        dest_path.mkdir(parents=True, exist_ok=True)
+
+    existing = dest_path
+    while not existing.exists():
+        existing = existing.parent
+    dest_device = existing.stat().st_dev
+
+    plan = []
+    _move_contents(src_path, dest_path, force, dest_device, plan, dry_run)
+
+    if dry_run:
+        return plan
+    return True
+
+
+def _move_contents(src_path, dest_path, force, dest_device, plan, dry_run):
+    for item in src_path.iterdir():
         dest_item = dest_path / item.name
-        
-        if dest_item.exists() and not force:
+        step = {"source": str(item), "destination": str(dest_item)}
+        exists = os.path.lexists(dest_item)
+
+        if exists and not force:
             print(dest_item, 'exists ... skipping')
+            plan.append({"action": "skip", **step})
             continue
-        
-        if item.is_file():
-            shutil.copy2(item, dest_item)
-        elif item.is_dir():
-            if dest_item.exists() and dest_item.is_dir():
-                mvdir(str(dest_item), str(item), force)
-            else:
-                shutil.copytree(item, dest_item, dirs_exist_ok=force)
-    
-    return True
+
+        is_dir = item.is_dir() and not item.is_symlink()
+        if exists and is_dir and dest_item.is_dir() and not dest_item.is_symlink():
+            plan.append({"action": "merge", **step})
+            _move_contents(item, dest_item, force, dest_device, plan, dry_run)
+            if not dry_run:
+                with contextlib.suppress(OSError):
+                    item.rmdir()
+            continue
+
+        if exists and dest_item.is_dir() and not dest_item.is_symlink():
+            # never replace a whole directory tree with a file
+            print(dest_item, 'is a directory ... skipping')
+            plan.append({"action": "conflict", **step})
+            continue
+
+        same_device = item.lstat().st_dev == dest_device
+        plan.append({"action": "rename" if same_device else "copy", **step})
+        if dry_run:
+            continue
+
+        if exists and is_dir:
+            dest_item.unlink()
+
+        if same_device:
+            try:
+                os.replace(item, dest_item)
+                continue
+            except OSError as e:
+                # bind mounts and overlays can share st_dev and still refuse renames
+                if e.errno != errno.EXDEV:
+                    raise
+        _copy_and_remove(item, dest_item, is_dir)
+
+
+def _copy_and_remove(item, dest_item, is_dir):
+    if is_dir:
+        shutil.copytree(item, dest_item, symlinks=True, copy_function=fastcopy)
+        shutil.rmtree(item)
+        return
+    if os.path.lexists(dest_item):
+        dest_item.unlink()
+    if item.is_symlink():
+        os.symlink(os.readlink(item), dest_item)
+    else:
+        fastcopy(item, dest_item)
+    item.unlink()
@@ -1,7 +1,11 @@
 import os
 import json
 import re
+import subprocess
+import tempfile
 import textwrap
+import threading
+import weakref
 
 from kevinlulee.string_utils import split
 from .bash import bash
@@ -13,98 +17,430 @@ def trim_lines(s):
     return [line.strip() for line in s.splitlines()]
 
 
+HISTORY_FORMAT = "%x1e%H%x1f%an%x1f%ad%x1f%ct%x1f%s%x1f"
+
+
+def parse_history_record(record: bytes) -> dict:
+    """Parses one commit of `git log -z --numstat --pretty=format:HISTORY_FORMAT`."""
+    commit_hash, author, date, timestamp, subject, tail = record.split(b"\x1f", 5)
+    commit = {
+        "hash": commit_hash.decode(),
+        "author": author.decode(errors="replace"),
+        "date": date.decode(),
+        "timestamp": int(timestamp),
+        "message": subject.decode(errors="replace"),
+        "files": [],
+    }
+
+    tokens = iter(tail.lstrip(b"\n").split(b"\0"))
+    for token in tokens:
+        if not token:
+            continue
+        insertions, deletions, filename = token.split(b"\t", 2)
+        if not filename:
+            # a rename: the old and new paths follow as their own fields
+            next(tokens, None)
+            filename = next(tokens, b"")
+        commit["files"].append({
+            "filename": filename.decode(errors="surrogateescape"),
+            "deletions": 0 if deletions == b"-" else int(deletions),
+            "insertions": 0 if insertions == b"-" else int(insertions),
+        })
+    return commit
+
+
+class CatFile:
+    """A long-lived `git cat-file --batch` (or `--batch-check`) process.
+
+    Object names are written to the process one per line and responses are
+    read back in order, so looking up many objects costs one fork instead
+    of one per object. The process is started on first use and restarted
+    if it has exited.
+    """
+
+    def __init__(self, cwd, check=False):
+        self.cwd = cwd
+        self.check = check
+        self.proc = None
+        self.lock = threading.Lock()
+
+    def _start(self):
+        if self.proc is None or self.proc.poll() is not None:
+            mode = "--batch-check" if self.check else "--batch"
+            self.proc = subprocess.Popen(
+                ["git", "cat-file", mode],
+                cwd=self.cwd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        return self.proc
+
+    def _read(self, stdout):
+        header = stdout.readline()
+        if not header:
+            raise OSError("git cat-file exited unexpectedly")
+        header = header.rstrip(b"\n")
+        if header.endswith((b" missing", b" ambiguous")):
+            # "<name> missing", where the name itself may contain spaces
+            return None
+        oid, type, size = header.rsplit(b" ", 2)
+        oid, type, size = oid.decode(), type.decode(), int(size)
+        if self.check:
+            return oid, type, size
+        data = stdout.read(size)
+        stdout.read(1)
+        return oid, type, data
+
+    def get_many(self, names):
+        """Looks up objects by name, e.g. "HEAD:path/to/file".
+
+        Returns:
+            A list with, per name, (oid, type, content bytes) -- or
+            (oid, type, size) for a --batch-check process -- and None for
+            names that do not resolve to an object.
+        """
+        names = list(names)
+        # a newline would split the request in two and desync the responses
+        requests = [name for name in names if "\n" not in name]
+        with self.lock:
+            proc = self._start()
+
+            def write():
+                try:
+                    for name in requests:
+                        proc.stdin.write(name.encode() + b"\n")
+                    proc.stdin.flush()
+                except BrokenPipeError:
+                    pass
+
+            # write on a thread so large responses cannot fill the pipe and deadlock
+            writer = threading.Thread(target=write)
+            writer.start()
+            try:
+                responses = iter([self._read(proc.stdout) for _ in requests])
+            except BaseException:
+                # unread responses would be handed to the next call: start over instead
+                proc.kill()
+                writer.join()
+                self.proc = None
+                try:
+                    proc.stdin.close()
+                except OSError:
+                    pass
+                proc.stdout.close()
+                proc.wait()
+                raise
+            writer.join()
+        return [None if "\n" in name else next(responses) for name in names]
+
+    def get(self, name):
+        return self.get_many([name])[0]
+
+    def close(self):
+        proc, self.proc = self.proc, None
+        if proc is None:
+            return
+        try:
+            proc.stdin.close()
+            proc.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            proc.kill()
+        proc.stdout.close()
+
+
+def _close_all(closeables):
+    for closeable in closeables:
+        closeable.close()
+
+
 class HistoryData:
     def get_history(self):
-        cmd = [
-            "log",
-            "--numstat",
-            "--date=iso",
-            "--pretty=format:%H|%an|%ad|%s",
-        ]
-        result = self.log_cmd(*cmd)
-
-        commits = []
-        commit = None
-
-        for line in result:
-            commit_match = re.search(r"^(\w+)\|(.*?)\|(.*?)\|(.*)$", line)
-            if commit_match:
-                if commit:
-                    commits.append(commit)
-                commit = {
-                    "hash": commit_match.group(1),
-                    "author": commit_match.group(2),
-                    "date": commit_match.group(3),
-                    "message": commit_match.group(4),
-                    "files": [],
-                }
-            elif commit and line.strip():
-                numstat_match = re.match(r"^(\d+|-)\s+(\d+|-)\s+(.+)$", line)
-                if numstat_match:
-                    insertions = numstat_match.group(1)
-                    deletions = numstat_match.group(2)
-                    filename = numstat_match.group(3)
+        return list(self.iter_history())
 
-                    deletions = 0 if deletions == "-" else int(deletions)
-                    insertions = 0 if insertions == "-" else int(insertions)
+    def iter_history(self, limit=None, since=None, paths=None, revs=None, stdin_revs=None):
+        """Yields commits newest first, parsing `git log` as it streams in.
 
-                    file_entry = {
-                        "filename": filename,
-                        "deletions": deletions,
-                        "insertions": insertions,
-                    }
+        The log is read from a pipe in chunks and uses NUL/ASCII separator
+        bytes, so memory stays bounded and subjects or paths containing
+        "|" or spaces parse correctly. Closing the generator early stops git.
 
-                    commit["files"].append(file_entry)
+        Args:
+            limit: The maximum number of commits.
+            since: Only commits more recent than this, in any format
+                   `git log --since` accepts (e.g. "2 weeks ago").
+            paths: Only commits touching these paths.
+            revs: Revisions to walk instead of HEAD, e.g. ["--all"].
+            stdin_revs: Revisions passed to `git log --stdin`, for lists too
+                        long for the command line, e.g. ["<sha>", "^<sha>"].
+
+        Yields:
+            {"hash", "author", "date", "timestamp", "message", "files"} dicts,
+            where files holds {"filename", "insertions", "deletions"} dicts.
+        """
+        args = ["git", "log", "-z", "--numstat", "--date=iso", f"--pretty=format:{HISTORY_FORMAT}"]
+        if limit:
+            args.append(f"--max-count={limit}")
+        if since:
+            args.append(f"--since={since}")
+        args.extend(revs or [])
+        input = None
+        if stdin_revs is not None:
+            args.append("--stdin")
+            input = "".join(f"{rev}\n" for rev in stdin_revs).encode()
+        if paths:
+            args += ["--", *paths]
+
+        for record in self._stream_records(args, input=input):
+            yield parse_history_record(record)
+
+    def _stream_records(self, args, input=None):
+        """Runs a git command and yields its output split on \\x1e, as it streams in."""
+        # stderr goes to a file: a pipe nobody reads until stdout ends could fill and block git
+        stderr = tempfile.TemporaryFile()
+        proc = subprocess.Popen(
+            args,
+            cwd=self.cwd,
+            stdin=subprocess.PIPE if input is not None else None,
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+        )
+        try:
+            if input is not None:
+                # git log --stdin reads all of its input before writing anything
+                proc.stdin.write(input)
+                proc.stdin.close()
+
+            # the pieces of a record that spans chunks, joined once it ends
+            pending = []
+            while chunk := proc.stdout.read(1 << 16):
+                records = chunk.split(b"\x1e")
+                if len(records) > 1 and pending:
+                    pending.append(records[0])
+                    records[0] = b"".join(pending)
+                    pending = []
+                pending.append(records.pop())
+                for record in records:
+                    if record:
+                        yield record
+            if tail := b"".join(pending):
+                yield tail
+
+            returncode = proc.wait()
+            if returncode:
+                stderr.seek(0)
+                err = stderr.read().decode(errors="replace").strip()
+                self.on_error(err or f"{' '.join(args[:2])} exited with status {returncode}")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.stdout.close()
+            stderr.close()
+            proc.wait()
+
+
+def _status_kind(kind, xy):
+    if kind == "?":
+        return "created"
+    if kind == "u":
+        return "unmerged"
+    if kind == "2":
+        return "renamed" if "R" in xy else "added"
+    if "D" in xy:
+        return "deleted"
+    if xy[0] == "A":
+        return "added"
+    return "modified"
+
+
+def parse_status_v2(output: bytes, cwd) -> list:
+    """Parses `git status --porcelain=v2 -z` output.
+
+    Returns:
+        A list of dicts with "status" (created, added, modified, deleted,
+        renamed or unmerged), "file", "xy" (e.g. ".M"; "??" for untracked
+        files), "staged", "unstaged", "original" (the source of a rename,
+        else None) and "submodule" (None, or a dict of the submodule's
+        commit_changed / modified / untracked flags). Paths are absolute.
+    """
+    # the number of space-separated fields before the path, per entry type
+    fields = {"1": 8, "2": 9, "u": 10}
+    records = output.split(b"\0")
+    changes = []
+    i = 0
+    while i < len(records):
+        record = records[i]
+        i += 1
+        if not record or record[:1] in (b"#", b"!"):
+            continue
+
+        kind = chr(record[0])
+        if kind == "?":
+            xy, sub, path = "??", "N...", record[2:]
+        else:
+            parts = record.split(b" ", fields[kind])
+            xy, sub, path = parts[1].decode(), parts[2].decode(), parts[-1]
+
+        original = None
+        if kind == "2":
+            original = os.path.abspath(os.path.join(cwd, os.fsdecode(records[i])))
+            i += 1
+
+        changes.append(
+            {
+                "status": _status_kind(kind, xy),
+                "file": os.path.abspath(os.path.join(cwd, os.fsdecode(path))),
+                "xy": xy,
+                "staged": xy[0] not in ".?",
+                "unstaged": xy[1] != ".",
+                "original": original,
+                "submodule": None if sub[0] == "N" else {
+                    "commit_changed": sub[1] == "C",
+                    "modified": sub[2] == "M",
+                    "untracked": sub[3] == "U",
+                },
+            }
+        )
+    return changes
 
-        if commit:
-            commits.append(commit)
 
-        return commits
+def parse_ignored_dirs(output: bytes, cwd) -> list:
+    """Returns the ignored directories in `git status --porcelain=v2 -z --ignored`
+    output, joined onto cwd the way `os.scandir` builds its entry paths.
+    """
+    return [
+        os.path.join(cwd, os.fsdecode(record[2:-1]))
+        for record in output.split(b"\0")
+        if record[:2] == b"! " and record.endswith(b"/")
+    ]
 
 
 class StatusData:
+    def _status_key(self):
+        """The mtimes of what git status reads besides the working tree:
+        the index, HEAD, info/exclude and the user's global excludes file.
+        """
+        from .git_index import get_git_dir
+
+        # resolving a .git file can take a git call, so remember the result
+        if not self._git_dir:
+            self._git_dir = get_git_dir(self.cwd)
+        git_dir = self._git_dir
+        if not git_dir:
+            return None
+
+        native = self.native
+        excludes = native and native.config_value("core.excludesFile")
+        if not excludes:
+            xdg = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+            excludes = os.path.join(xdg, "git", "ignore")
+        paths = (
+            os.path.join(git_dir, "index"),
+            os.path.join(git_dir, "HEAD"),
+            os.path.join(native.common_dir if native else git_dir, "info", "exclude"),
+            os.path.expanduser(excludes),
+        )
+        key = []
+        for path in paths:
+            try:
+                key.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                key.append(None)
+        return tuple(key)
+
     def get_files(self, filter="*"):
-        s = self.cmd("status")
-        changes = []
+        """The changed files of the working tree, see `parse_status_v2`.
 
-        # Untracked files
-        untracked_match = re.search(
-            r"Untracked files:\n.*?\n((?:\s{4}.+\n)+)", s
-        )
-        if untracked_match:
-            untracked = [
-                line.strip() for line in untracked_match.group(1).splitlines()
-            ]
-            changes.extend(
-                {
-                    "status": "created",
-                    "file": os.path.abspath(os.path.join(self.cwd, f)),
-                }
-                for f in untracked
+        The result is cached against `_status_key` and a `DirectorySnapshot`
+        of the working tree. The snapshot skips the directories git reported
+        as ignored, so calling this again before anything changed costs a
+        few stats and a scan of the tracked and untracked files, not a git call.
+
+        Args:
+            filter: A status to keep, e.g. "modified". "*" keeps all.
+        """
+        from .snapshot import DirectorySnapshot
+
+        key = self._status_key()
+        cached = self._status_cache
+        ignore_dirs = cached[1] if cached else frozenset([".git"])
+        # scanned before git status runs, so a change made meanwhile shows up next time
+        snapshot = DirectorySnapshot.scan(self.cwd, ignore_dirs=ignore_dirs)
+        if cached and key is not None and cached[0] == key and cached[2] == snapshot:
+            changes = cached[3]
+        else:
+            result = subprocess.run(
+                ["git", "status", "--porcelain=v2", "-z", "--ignored"], cwd=self.cwd, capture_output=True
+            )
+            if result.returncode:
+                return self.on_error(result.stderr.decode(errors="replace").strip())
+            changes = parse_status_v2(result.stdout, self.cwd)
+            ignored = frozenset([".git", *parse_ignored_dirs(result.stdout, self.cwd)])
+            # the snapshot only fits the new ignore list if that did not change;
+            # git status may refresh the index, so key on the state it left behind
+            self._status_cache = (
+                self._status_key(),
+                ignored,
+                snapshot if ignored == ignore_dirs else None,
+                changes,
             )
 
-        # Modified, deleted, renamed
-        matches = re.findall(
-            r"^\s*(modified|deleted|renamed):\s+(.+)", s, re.MULTILINE
-        )
-        changes.extend(
-            {
-                "status": status,
-                "file": os.path.abspath(os.path.join(self.cwd, f.strip())),
-            }
-            for status, f in matches
-        )
+        # copies, so callers cannot change the cached entries
+        return [
+            {**c, "submodule": c["submodule"] and dict(c["submodule"])}
+            for c in changes
+            if filter == "*" or c["status"] == filter
+        ]
 
-        if filter == "*":
-            return changes
 
-        return [c for c in changes if c["status"] == filter]
+COMMIT_INFO_FORMATS = {
+    "hash": "%H",  # Full hash
+    "short_hash": "%h",  # Short hash
+    "author": "%an <%ae>",  # Author name and email
+    "author_date": "%ai",  # Author date (ISO format)
+    "committer": "%cn <%ce>",  # Committer name and email
+    "committer_date": "%ci",  # Committer date (ISO format)
+    "subject": "%s",  # Subject/title
+    "body": "%b",  # Message body
+    "parent_hashes": "%P",  # Parent hashes
+    "refs": "%D",  # Refs (tags, branches)
+}
+
+
+def iter_name_status(tail: bytes):
+    """Yields (status, old path, new path) for each entry of `--name-status -z`
+    output. The paths only differ for renames and copies.
+    """
+    tokens = iter(tail.split(b"\0"))
+    for token in tokens:
+        status = token.strip(b"\n")
+        if not status:
+            continue
+        old = new = next(tokens, b"").decode(errors="surrogateescape")
+        if status[:1] in (b"R", b"C"):
+            new = next(tokens, b"").decode(errors="surrogateescape")
+        yield status.decode(), old, new
+
+
+def parse_name_status(tail: bytes) -> list:
+    """Returns the paths of `--name-status -z` output, using the new path of renames and copies."""
+    return [new for _, _, new in iter_name_status(tail)]
 
 
 class GitProperties:
-    def get_commit_info(
+    def get_commit_info(self, commit, **kwargs):
+        """
+        Dynamically retrieve commit information based on specified parameters.
+        See `get_commit_infos` for the parameters.
+
+        Returns:
+            A dictionary containing the requested commit information
+        """
+        return self.get_commit_infos([commit], **kwargs)[0]
+
+    def get_commit_infos(
         self,
-        commit,
+        commits,
         hash=False,
         short_hash=False,
         author=True,
@@ -118,11 +454,14 @@ class GitProperties:
         changed_files=False,
     ):
         """
-        Dynamically retrieve commit information based on specified parameters.
+        Retrieve information about many commits with a single `git log`.
+
+        The commits are resolved over the repo's cat-file session, passed to
+        `git log --no-walk=unsorted --stdin` and the NUL-delimited output is
+        parsed as it streams in.
 
         Args:
-            repo: The repository object with cmd method
-            commit: The commit identifier
+            commits: Commit identifiers (hashes, refs, "HEAD~2", ...)
             hash: Whether to get the full commit hash
             short_hash: Whether to get the abbreviated commit hash
             author: Whether to get author name and email
@@ -133,27 +472,14 @@ class GitProperties:
             body: Whether to get commit message body
             parent_hashes: Whether to get parent commit hashes
             refs: Whether to get associated references (tags, branches)
-            changed_files: Whether to get the list of changed files
+            changed_files: Whether to get the changed files, newline-joined
 
         Returns:
-            A dictionary containing the requested commit information
+            A list with one dictionary of the requested information per
+            commit. Commits that do not exist are passed to `on_error` and
+            get an empty dictionary.
         """
-        # Define mappings for git format specifiers
-        format_specs = {
-            "hash": "%H",  # Full hash
-            "short_hash": "%h",  # Short hash
-            "author": "%an <%ae>",  # Author name and email
-            "author_date": "%ai",  # Author date (ISO format)
-            "committer": "%cn <%ce>",  # Committer name and email
-            "committer_date": "%ci",  # Committer date (ISO format)
-            "subject": "%s",  # Subject/title
-            "body": "%b",  # Message body
-            "parent_hashes": "%P",  # Parent hashes
-            "refs": "%D",  # Refs (tags, branches)
-        }
-
-        # Build format string based on requested parameters
-        format_parts = []
+        commits = list(commits)
         params = {
             "hash": hash,
             "short_hash": short_hash,
@@ -166,61 +492,38 @@ class GitProperties:
             "parent_hashes": parent_hashes,
             "refs": refs,
         }
-
-        for key, value in params.items():
-            if value:
-                format_parts.append(f"{key.upper()}:{format_specs[key]}%n")
-
-        # If no valid parameters specified, return empty dict
-        if not format_parts:
-            return {}
-
-        # Create format string
-        format_string = "".join(format_parts)
-
-        # Get commit information with a single command
-        commit_output = self.cmd(
-            "show", "-s", f"--format={format_string}", commit
-        )
-
-        # Add files changed if requested
+        keys = [key for key, value in params.items() if value]
+        if not keys and not changed_files:
+            return [{} for _ in commits]
+
+        oids = []
+        for commit, info in zip(commits, self._cat_file_check.get_many([f"{c}^{{commit}}" for c in commits])):
+            if info is None:
+                self.on_error(f"fatal: bad revision '{commit}'")
+            oids.append(info and info[0])
+
+        # always ask for %H to match the output back to the commits
+        format_string = "%x1e%H%x1f" + "".join(f"{COMMIT_INFO_FORMATS[key]}%x1f" for key in keys)
+        args = ["git", "log", "--no-walk=unsorted", "--stdin", "-z", f"--format={format_string}"]
         if changed_files:
-            files_changed = self.cmd("show", "--name-only", "--format=", commit)
-
-        # Parse the output into a dictionary
-        result = {}
-        current_key = None
-        current_value = []
-
-        for line in commit_output.splitlines():
-            # Check if this line starts a new section
-            is_header = False
-            for key in params:
-                if params[key] and line.startswith(f"{key.upper()}:"):
-                    if current_key:
-                        result[current_key] = (
-                            "\n".join(current_value) if current_value else ""
-                        )
-                        current_value = []
-                    current_key = key.lower()
-                    current_value = [
-                        line.split(":", 1)[1] if ":" in line else ""
-                    ]
-                    is_header = True
-                    break
-
-            if not is_header and current_key:
-                current_value.append(line)
-
-        # Add the last key
-        if current_key and current_value:
-            result[current_key] = "\n".join(current_value)
-
-        # Add changed files if requested
-        if changed_files:
-            result["changed_files"] = files_changed
+            args.append("--name-status")
+
+        found = {}
+        unique = list(dict.fromkeys(oid for oid in oids if oid))
+        if unique:
+            for record in self._stream_records(args, input="\n".join(unique).encode() + b"\n"):
+                fields = record.split(b"\x1f", len(keys) + 1)
+                result = {
+                    key: value.decode(errors="replace")
+                    for key, value in zip(keys, fields[1:])
+                }
+                if "body" in result:
+                    result["body"] = result["body"].rstrip("\n")
+                if changed_files:
+                    result["changed_files"] = "\n".join(parse_name_status(fields[-1]))
+                found[fields[0].decode()] = result
 
-        return result
+        return [dict(found[oid]) if oid in found else {} for oid in oids]
 
     def get_file_commits(self, target_file):
         return self.log_cmd("log", "--all", "--format=%H", "--", target_file)
@@ -247,7 +550,9 @@ class GitRepo(HistoryData, StatusData, GitProperties):
         if url:
             return '/'.join(split(url, '/')[-2:])
     def is_git_directory(self):
-        return os.path.isdir(os.path.join(self.cwd, ".git"))
+        from .git_native import find_git_dir
+
+        return find_git_dir(self.cwd) is not None
 
     def diff(self, *files):
         return self.cmd("diff", *files)
@@ -274,6 +579,104 @@ class GitRepo(HistoryData, StatusData, GitProperties):
         self.errors = []
         self.commands = GitCommands(self)
         self.strict = False
+        self._history_index = None
+        self._path_index = None
+        self._status_cache = None
+        self._git_dir = None
+        self._cat_file = CatFile(self.cwd)
+        self._cat_file_check = CatFile(self.cwd, check=True)
+        self._native = None
+        self._closeables = [self._cat_file, self._cat_file_check]
+        self._finalizer = weakref.finalize(self, _close_all, self._closeables)
+
+    @property
+    def native(self):
+        """A `GitNative` reader of this repository's files, or None when
+        cwd is not a repository root (then everything goes through git).
+        """
+        if self._native is None:
+            from .git_native import GitNative
+
+            self._native = GitNative.open(self.cwd)
+            if self._native:
+                self._closeables.append(self._native)
+        return self._native
+
+    def _native_read_many(self, names):
+        native = self.native
+        results = [native.read(name) if native else None for name in names]
+        missing = [i for i, result in enumerate(results) if result is None]
+        if missing:
+            for i, result in zip(missing, self._cat_file.get_many([names[i] for i in missing])):
+                results[i] = result
+        return results
+
+    def close(self):
+        """Stops the repository's cat-file processes, unmaps its packfiles and closes its history index.
+        Also happens when the repo object is garbage collected or used as a
+        context manager.
+        """
+        self._finalizer()
+        self._native = None
+        if self._history_index is not None:
+            self._history_index.close()
+            self._history_index = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def cat_file(self, name):
+        """Returns the raw content of an object, e.g. "HEAD:a.txt", or None if it does not exist."""
+        result = self._native_read_many([name])[0]
+        return result[2] if result else None
+
+    def object_info(self, name):
+        """Returns (oid, type, size) of an object, or None if it does not exist."""
+        return self._cat_file_check.get(name)
+
+    def show_many(self, pairs):
+        """Reads many files at many commits, straight from the object
+        database where `GitNative` can, else over one cat-file process.
+
+        Args:
+            pairs: (commit, path) tuples.
+
+        Returns:
+            A list with the stripped text of each file, like
+            `GitCommands.show`. Missing objects are passed to `on_error`.
+        """
+        pairs = list(pairs)
+        names = [f"{commit}:{path}" for commit, path in pairs]
+        results = []
+        for name, result in zip(names, self._native_read_many(names)):
+            if result is None:
+                results.append(self.on_error(f"fatal: invalid object name '{name}'"))
+            elif result[1] != "blob":
+                results.append(self.cmd("show", name))
+            else:
+                results.append(result[2].decode(errors="replace").strip())
+        return results
+
+    @property
+    def history_index(self):
+        """The persistent commit index of this repository. See `HistoryIndex`."""
+        if self._history_index is None:
+            from .git_index import HistoryIndex
+
+            self._history_index = HistoryIndex(self)
+        return self._history_index
+
+    @property
+    def path_index(self):
+        """The in-memory path -> commits index of this repository. See `PathIndex`."""
+        if self._path_index is None:
+            from .git_index import PathIndex
+
+            self._path_index = PathIndex(self)
+        return self._path_index
 
     def init(self):
         return self.cmd("init")
@@ -292,7 +695,15 @@ class GitRepo(HistoryData, StatusData, GitProperties):
         return self.cmd("push", remote, branch)
 
     def commit(self, message):
-        return self.cmd("commit", "-m", message)
+        # not through cmd: bash() splits its arguments on spaces
+        if self.debug:
+            return print("[DEBUG]", "git commit -m", message)
+        result = subprocess.run(
+            ["git", "commit", "-m", message], cwd=self.cwd, capture_output=True, text=True
+        )
+        if result.returncode:
+            return self.on_error(result.stderr.strip() or result.stdout.strip())
+        return result.stdout.strip()
 
     def create_branch(self, branch_name):
         return self.cmd("branch", branch_name)
@@ -302,10 +713,16 @@ class GitRepo(HistoryData, StatusData, GitProperties):
 
     @property
     def branch(self):
+        branch = self.native and self.native.branch()
+        if branch is not None:
+            return branch
         return self.cmd("branch", "--show-current")
 
     @property
     def symbolic_full_name(self):
+        upstream = self.native and self.native.upstream()
+        if upstream is not None:
+            return upstream or None
         a = self.cmd(
             "rev-parse", "--abbrev-ref", "--symbolic-full-name", "@{u}"
         )
@@ -330,11 +747,17 @@ class GitRepo(HistoryData, StatusData, GitProperties):
 
     @property
     def remotes(self):
+        remotes = self.native and self.native.remotes()
+        if remotes is not None:
+            return remotes
         output = self.cmd("remote")
         return trim_lines(output)
 
     @property
     def url(self):
+        url = self.native and self.native.remote_url(DEFAULT_REMOTE_NAME)
+        if url is not None:
+            return url
         output = self.cmd("remote", "get-url", DEFAULT_REMOTE_NAME)
         return output
 
@@ -343,6 +766,9 @@ class GitRepo(HistoryData, StatusData, GitProperties):
 
     @property
     def username(self):
+        username = self.native and self.native.config_value("user.name")
+        if username is not None:
+            return username
         return self.cmd("config", "user.name")
 
     def is_clean(self):
@@ -376,9 +802,9 @@ class GitCommands:
         return self.cmd(*args, debug = False)
 
     def show(self, commit, file = None):
-        el = f'{commit}:{file}' if file else commit
-        args = ['show', el]
-        return self.repo.cmd(*args)
+        if file:
+            return self.repo.show_many([(commit, file)])[0]
+        return self.repo.cmd('show', commit)
         
     def __init__(self, repo: GitRepo):
         self.repo = repo
@@ -0,0 +1,107 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .git import GitRepo, DEFAULT_REMOTE_NAME
+
+
+def _repo_path(path):
+    # accept the .git directories that collect_git_directories produces
+    path = re.sub(r"/+$", "", os.path.expanduser(path))
+    if os.path.basename(path) == ".git":
+        path = os.path.dirname(path)
+    return path
+
+
+def parse_status(output):
+    """Parses `git status --porcelain -b` output."""
+    lines = output.splitlines()
+    status = {"branch": None, "upstream": None, "ahead": 0, "behind": 0, "changes": []}
+    if lines and lines[0].startswith("## "):
+        header = lines.pop(0)[3:]
+        m = re.match(r"(?:No commits yet on )?(.+?)(?:\.\.\.(\S+))?(?: \[(.*)\])?$", header)
+        if m:
+            status["branch"], status["upstream"], tracking = m.groups()
+            for key, count in re.findall(r"(ahead|behind) (\d+)", tracking or ""):
+                status[key] = int(count)
+    status["changes"] = [line for line in lines if line.strip()]
+    status["clean"] = not status["changes"]
+    return status
+
+
+class GitFleet:
+    """Runs git operations over many repositories at once.
+
+    Every operation runs on a thread pool of `workers` threads, so at most
+    that many git processes run at a time. Nothing is printed: each
+    operation returns one result per repository, in the order the
+    repositories were given:
+
+        {"path": ..., "ok": bool, "result": ..., "errors": [...], "seconds": float}
+
+    "errors" holds the git errors the repository reported (see
+    `GitRepo.on_error`) and any exception raised during the operation.
+    """
+
+    def __init__(self, paths, workers=8):
+        self.repos = [path if isinstance(path, GitRepo) else GitRepo(_repo_path(path)) for path in paths]
+        self.workers = workers
+
+    @classmethod
+    def discover(cls, dirs, workers=8):
+        """Creates a fleet from the git repositories found under dirs."""
+        from .scripts.collect_git_directories import collect_git_directories
+
+        return cls(collect_git_directories(dirs), workers=workers)
+
+    def __len__(self):
+        return len(self.repos)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        for repo in self.repos:
+            repo.close()
+
+    def run(self, fn, *args, **kwargs):
+        """Calls fn(repo, *args, **kwargs) for every repository.
+
+        Returns:
+            A list of per-repository results, see `GitFleet`.
+        """
+
+        def call(repo):
+            errors = len(repo.errors)
+            start = time.perf_counter()
+            result = None
+            try:
+                result = fn(repo, *args, **kwargs)
+            except Exception as e:
+                repo.errors.append(str(e))
+            new_errors = repo.errors[errors:]
+            return {
+                "path": repo.cwd,
+                "ok": not new_errors,
+                "result": result,
+                "errors": new_errors,
+                "seconds": time.perf_counter() - start,
+            }
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(call, self.repos))
+
+    def status(self):
+        """Branch, upstream, ahead/behind counts and changed files of every repository."""
+        return self.run(lambda repo: parse_status(repo.cmd("status", "--porcelain", "-b")))
+
+    def commit_all(self, m="autocommit"):
+        """Commits every change in every dirty repository. Clean repositories get a None result."""
+        return self.run(lambda repo: repo.commands.commit_all(m))
+
+    def fetch(self, remote=DEFAULT_REMOTE_NAME):
+        return self.run(lambda repo: repo.cmd("fetch", remote))
+
+    def push(self, remote=DEFAULT_REMOTE_NAME, branch=None):
+        return self.run(lambda repo: repo.push(remote, branch))
@@ -0,0 +1,303 @@
+import os
+import sqlite3
+import subprocess
+from array import array
+
+from .ao import filtered
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    id INTEGER PRIMARY KEY,
+    hash TEXT UNIQUE NOT NULL,
+    author TEXT,
+    date TEXT,
+    timestamp INTEGER,
+    message TEXT,
+    batch INTEGER
+);
+CREATE TABLE IF NOT EXISTS files (
+    commit_id INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    insertions INTEGER,
+    deletions INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_by_filename ON files (filename);
+CREATE INDEX IF NOT EXISTS files_by_commit ON files (commit_id);
+CREATE INDEX IF NOT EXISTS commits_by_time ON commits (timestamp);
+CREATE TABLE IF NOT EXISTS tips (hash TEXT PRIMARY KEY);
+"""
+
+
+def get_git_dir(cwd):
+    from .git_native import find_git_dir
+
+    path = find_git_dir(cwd)
+    if path:
+        return path
+    result = subprocess.run(
+        ["git", "rev-parse", "--absolute-git-dir"], cwd=cwd, capture_output=True, text=True
+    )
+    return result.stdout.strip() or None
+
+
+def get_tips(repo):
+    """Returns the commits every ref and HEAD point at, read from the ref
+    files when possible so that a refresh with nothing new forks nothing.
+    """
+    native = repo.native
+    tips = native and native.tips()
+    if tips is not None:
+        return tips
+
+    cwd = repo.cwd
+    result = subprocess.run(
+        ["git", "for-each-ref", "--format=%(objectname)"], cwd=cwd, capture_output=True, text=True
+    )
+    tips = set(result.stdout.split())
+    head = subprocess.run(["git", "rev-parse", "--verify", "-q", "HEAD"], cwd=cwd, capture_output=True, text=True)
+    tips.update(head.stdout.split())
+    return tips
+
+
+def get_walk_revs(repo, tips, old_tips):
+    """The `git log --stdin` revisions for the commits reachable from tips
+    but not from old_tips. Old tips that no longer exist (e.g. after a gc)
+    are dropped, since git log would fail on them.
+    """
+    old_tips = sorted(old_tips)
+    known = repo._cat_file_check.get_many(old_tips)
+    return [*sorted(tips), *[f"^{tip}" for tip, info in zip(old_tips, known) if info]]
+
+
+class HistoryIndex:
+    """An on-disk SQLite index of a repository's commits and numstat,
+    stored at .git/kevinlulee-history.sqlite.
+
+    `refresh` ingests only the commits reachable from the current refs that
+    were not reachable from the refs seen at the previous refresh. Each
+    refresh is one batch; git log order is kept within a batch. The
+    query methods refresh first unless told not to, so they stay in sync
+    with the repository and still answer from SQLite.
+    """
+
+    def __init__(self, repo, path=None):
+        self.repo = repo
+        if path is None:
+            git_dir = get_git_dir(repo.cwd)
+            if not git_dir:
+                raise ValueError(f"Not a git repository: {repo.cwd}")
+            path = os.path.join(git_dir, "kevinlulee-history.sqlite")
+        self.path = path
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def refresh(self):
+        """Indexes new commits.
+
+        Returns:
+            The number of commits added.
+        """
+        tips = get_tips(self.repo)
+        old_tips = {row[0] for row in self.db.execute("SELECT hash FROM tips")}
+        if tips == old_tips:
+            return 0
+
+        batch = self.db.execute("SELECT COALESCE(MAX(batch), 0) + 1 FROM commits").fetchone()[0]
+        errors = len(self.repo.errors)
+        added = 0
+        try:
+            for commit in self.repo.iter_history(stdin_revs=get_walk_revs(self.repo, tips, old_tips)):
+                cursor = self.db.execute(
+                    "INSERT OR IGNORE INTO commits (hash, author, date, timestamp, message, batch)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    (commit["hash"], commit["author"], commit["date"], commit["timestamp"], commit["message"], batch),
+                )
+                if not cursor.rowcount:
+                    continue
+                added += 1
+                self.db.executemany(
+                    "INSERT INTO files (commit_id, filename, insertions, deletions) VALUES (?, ?, ?, ?)",
+                    [
+                        (cursor.lastrowid, f["filename"], f["insertions"], f["deletions"])
+                        for f in commit["files"]
+                    ],
+                )
+            if len(self.repo.errors) > errors:
+                # git failed part way: keep the old tips so the next refresh retries
+                self.db.rollback()
+                return 0
+            self.db.execute("DELETE FROM tips")
+            self.db.executemany("INSERT INTO tips (hash) VALUES (?)", [(tip,) for tip in tips])
+            self.db.commit()
+        except BaseException:
+            self.db.rollback()
+            raise
+        return added
+
+    def history(self, limit=None, refresh=True):
+        """Like `GitRepo.get_history`, across all refs, newest first."""
+        if refresh:
+            self.refresh()
+        rows = self.db.execute(
+            "SELECT id, hash, author, date, timestamp, message FROM commits"
+            " ORDER BY timestamp DESC, batch DESC, id ASC LIMIT ?",
+            (limit or -1,),
+        ).fetchall()
+
+        commits = {}
+        for id, hash, author, date, timestamp, message in rows:
+            commits[id] = {
+                "hash": hash,
+                "author": author,
+                "date": date,
+                "timestamp": timestamp,
+                "message": message,
+                "files": [],
+            }
+
+        ids = list(commits)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for commit_id, filename, insertions, deletions in self.db.execute(
+                "SELECT commit_id, filename, insertions, deletions FROM files"
+                f" WHERE commit_id IN ({placeholders}) ORDER BY rowid",
+                chunk,
+            ):
+                commits[commit_id]["files"].append(
+                    {"filename": filename, "deletions": deletions, "insertions": insertions}
+                )
+        return list(commits.values())
+
+    def file_commits(self, target_file, refresh=True):
+        """Like `GitRepo.get_file_commits`: hashes of commits that touched the file."""
+        if refresh:
+            self.refresh()
+        rows = self.db.execute(
+            "SELECT DISTINCT c.hash, c.timestamp, c.batch, c.id FROM files f JOIN commits c ON c.id = f.commit_id"
+            " WHERE f.filename = ? ORDER BY c.timestamp DESC, c.batch DESC, c.id ASC",
+            (target_file,),
+        )
+        return [row[0] for row in rows]
+
+    def historical_files(self, pattern=None, refresh=True):
+        """Like `GitRepo.get_historical_files`: every path that ever had changes."""
+        if refresh:
+            self.refresh()
+        files = [row[0] for row in self.db.execute("SELECT DISTINCT filename FROM files")]
+        return filtered(files, pattern)
+
+
+class PathIndex:
+    """An in-memory inverted index from every path in a repository's history
+    to the commits that touched it, built from one
+    `git log --name-status -z -M` pass over all refs.
+
+    Commits live in a table (hash, commit time, refresh batch) and each
+    path maps to an array('I') of row numbers into it. Renames are
+    recorded so that `file_commits` can follow a file back through its
+    earlier names. Like `HistoryIndex`, a refresh only reads the commits
+    that appeared since the previous one.
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self.hashes = []
+        self.timestamps = array("q")
+        self.batches = array("I")
+        self.paths = {}
+        self.renames = {}
+        self.tips = set()
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def refresh(self):
+        """Indexes new commits.
+
+        Returns:
+            The number of commits added.
+        """
+        from .git import iter_name_status
+
+        tips = get_tips(self.repo)
+        if tips == self.tips:
+            return 0
+
+        batch = self.batches[-1] + 1 if self.batches else 1
+        known = len(self.hashes)
+        errors = len(self.repo.errors)
+        args = ["git", "log", "-z", "-M", "--name-status", "--format=%x1e%H%x1f%ct%x1f", "--stdin"]
+        revs = get_walk_revs(self.repo, tips, self.tips)
+        records = list(self.repo._stream_records(args, input="".join(f"{rev}\n" for rev in revs).encode()))
+        if len(self.repo.errors) > errors:
+            # git failed part way: index nothing and keep the old tips so the next refresh retries
+            return 0
+
+        for record in records:
+            commit_hash, timestamp, tail = record.split(b"\x1f", 2)
+            row = len(self.hashes)
+            self.hashes.append(commit_hash.decode())
+            self.timestamps.append(int(timestamp))
+            self.batches.append(batch)
+            for status, old, new in iter_name_status(tail):
+                if status[0] == "R":
+                    self._add(old, row)
+                    self.renames.setdefault(new, []).append((old, row))
+                self._add(new, row)
+        self.tips = tips
+        return len(self.hashes) - known
+
+    def _add(self, path, row):
+        rows = self.paths.get(path)
+        if rows is None:
+            rows = self.paths[path] = array("I")
+        if not rows or rows[-1] != row:
+            rows.append(row)
+
+    def _order(self, row):
+        # newest first; within one commit time, later batches first, then git log order
+        return (-self.timestamps[row], -self.batches[row], row)
+
+    def _rows(self, path, follow, before=None, seen=None):
+        rows = self.paths.get(path, ())
+        if before is not None:
+            rows = [row for row in rows if self._order(row) >= before]
+        rows = set(rows)
+        if follow:
+            seen = seen or set()
+            seen.add(path)
+            for old, row in self.renames.get(path, ()):
+                order = self._order(row)
+                if old not in seen and (before is None or order >= before):
+                    rows |= self._rows(old, follow, order, seen)
+        return rows
+
+    def file_commits(self, target_file, follow=True, refresh=True):
+        """Like `GitRepo.get_file_commits`, answered from memory.
+
+        Args:
+            target_file: A path relative to the repository root.
+            follow: If True, include the commits of the names the file had
+                    before it was renamed.
+            refresh: If True, index new commits first.
+        """
+        if refresh:
+            self.refresh()
+        rows = sorted(self._rows(target_file, follow), key=self._order)
+        return [self.hashes[row] for row in rows]
+
+    def files_commits(self, files, follow=True, refresh=True):
+        """`file_commits` for many files after a single refresh, as a dict."""
+        if refresh:
+            self.refresh()
+        return {file: self.file_commits(file, follow=follow, refresh=False) for file in files}
+
+    def historical_files(self, pattern=None, refresh=True):
+        """Like `GitRepo.get_historical_files`: every path that ever had changes."""
+        if refresh:
+            self.refresh()
+        return filtered(list(self.paths), pattern)
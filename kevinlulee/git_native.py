@@ -0,0 +1,786 @@
+"""Reads a git repository's files directly, without running git.
+
+Covers what the `GitRepo` properties and blob lookups need: HEAD, loose
+and packed refs, config files, and loose and packed objects (pack index v2
+with OFS/REF delta resolution). Anything outside that -- include directives
+in config, url rewriting, reftable or SHA-256 repositories, abbreviated
+hashes, exotic revision syntax -- makes the methods here return None, and
+callers fall back to the git CLI.
+"""
+
+import os
+import re
+import glob
+import mmap
+import zlib
+import struct
+from collections import OrderedDict
+from functools import wraps
+
+OBJECT_TYPES = {1: "commit", 2: "tree", 3: "blob", 4: "tag"}
+OFS_DELTA = 6
+REF_DELTA = 7
+
+# refs that belong to one worktree rather than to the repository
+PER_WORKTREE_REFS = ("refs/worktree/", "refs/bisect/", "refs/rewritten/")
+
+HEX_SHA = re.compile(r"^[0-9a-f]{40}$")
+
+
+def find_git_dir(worktree):
+    """Returns the git directory of a worktree root, following `.git` files
+    (linked worktrees, submodules). None if worktree is not a repository root.
+    """
+    path = os.path.join(worktree, ".git")
+    if os.path.isdir(path):
+        return path
+    if os.path.isfile(path):
+        try:
+            with open(path) as f:
+                line = f.readline().strip()
+        except OSError:
+            return None
+        if line.startswith("gitdir:"):
+            git_dir = os.path.join(worktree, line[len("gitdir:"):].strip())
+            if os.path.isdir(git_dir):
+                return os.path.normpath(git_dir)
+    return None
+
+
+def _or_none(fn):
+    # a malformed or unexpected file means "ask the git CLI instead"
+    @wraps(fn)
+    def inner(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except (OSError, ValueError, IndexError, KeyError, zlib.error, struct.error):
+            return None
+
+    return inner
+
+
+# ======================================
+# config
+# ======================================
+
+
+class UnsupportedConfig(ValueError):
+    """Raised for config files that use features this parser leaves to git."""
+
+
+def _parse_value(line, pos, lines):
+    out = []
+    quoted = False
+    pending_space = ""
+    while True:
+        if pos >= len(line):
+            break
+        c = line[pos]
+        if c == "\\":
+            if pos + 1 >= len(line):
+                # a line continuation
+                if not lines:
+                    break
+                line, pos = lines.pop(0), 0
+                continue
+            escape = line[pos + 1]
+            out.append(pending_space + {"n": "\n", "t": "\t", "b": "\b"}.get(escape, escape))
+            pending_space = ""
+            pos += 2
+            continue
+        if c == '"':
+            quoted = not quoted
+        elif not quoted and c in "#;":
+            break
+        elif not quoted and c.isspace():
+            if out:
+                pending_space += c
+        else:
+            out.append(pending_space + c)
+            pending_space = ""
+        pos += 1
+    return "".join(out)
+
+
+def parse_config(text):
+    """Parses a git config file.
+
+    Returns:
+        A list of (section, subsection, name, value) tuples in file order.
+        Section and variable names are lowercased; a variable without "="
+        has the value True.
+
+    Raises:
+        UnsupportedConfig: For include and includeIf sections.
+    """
+    entries = []
+    section = subsection = None
+    lines = text.splitlines()
+    while lines:
+        line = lines.pop(0).lstrip()
+        if not line or line[0] in "#;":
+            continue
+
+        if line[0] == "[":
+            m = re.match(r'\[\s*([\w.-]+)\s*(?:"((?:[^"\\]|\\.)*)")?\s*\]', line)
+            if not m:
+                raise ValueError(f"bad config section: {line!r}")
+            section, subsection = m.group(1), m.group(2)
+            if subsection is not None:
+                subsection = re.sub(r"\\(.)", r"\1", subsection)
+            elif "." in section:
+                # the deprecated [section.subsection] form
+                section, subsection = section.split(".", 1)
+                subsection = subsection.lower()
+            section = section.lower()
+            if section in ("include", "includeif"):
+                raise UnsupportedConfig(section)
+            line = line[m.end():].lstrip()
+            if not line or line[0] in "#;":
+                continue
+
+        m = re.match(r"([A-Za-z][\w-]*)\s*(=?)", line)
+        if not m or section is None:
+            raise ValueError(f"bad config line: {line!r}")
+        value = _parse_value(line, m.end(), lines) if m.group(2) else True
+        entries.append((section, subsection, m.group(1).lower(), value))
+    return entries
+
+
+def split_config_key(key):
+    """Splits "remote.origin.url" into ("remote", "origin", "url")."""
+    section, _, rest = key.partition(".")
+    subsection, _, name = rest.rpartition(".")
+    return section.lower(), subsection or None, name.lower()
+
+
+class GitConfig:
+    """The merged config of a repository: system, global, then local.
+    Each file is re-parsed only when its mtime changes.
+    """
+
+    def __init__(self, git_dir):
+        self.git_dir = git_dir
+        self._cache = {}
+
+    def paths(self):
+        if os.environ.get("GIT_CONFIG_PARAMETERS") or os.environ.get("GIT_CONFIG_COUNT"):
+            raise UnsupportedConfig("config from the environment")
+
+        paths = []
+        if not os.environ.get("GIT_CONFIG_NOSYSTEM"):
+            paths.append(os.environ.get("GIT_CONFIG_SYSTEM", "/etc/gitconfig"))
+        if "GIT_CONFIG_GLOBAL" in os.environ:
+            paths.append(os.environ["GIT_CONFIG_GLOBAL"])
+        else:
+            xdg = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+            paths.append(os.path.join(xdg, "git", "config"))
+            paths.append(os.path.expanduser("~/.gitconfig"))
+        paths.append(os.path.join(self.git_dir, "config"))
+        return paths
+
+    def _read(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+        cached = self._cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        with open(path, encoding="utf-8", errors="surrogateescape") as f:
+            entries = parse_config(f.read())
+        self._cache[path] = (mtime, entries)
+        return entries
+
+    def entries(self):
+        entries = []
+        for path in self.paths():
+            entries.extend(self._read(path))
+        return entries
+
+    def get_all(self, key):
+        target = split_config_key(key)
+        return [value for *entry, value in self.entries() if tuple(entry) == target]
+
+    def get(self, key, default=None):
+        values = self.get_all(key)
+        return values[-1] if values else default
+
+    def subsections(self, section):
+        section = section.lower()
+        return list(dict.fromkeys(sub for s, sub, _, _ in self.entries() if s == section and sub is not None))
+
+    def has_section(self, section):
+        section = section.lower()
+        return any(s == section for s, _, _, _ in self.entries())
+
+
+# ======================================
+# objects
+# ======================================
+
+
+def _delta_size(delta, pos):
+    size = shift = 0
+    while True:
+        c = delta[pos]
+        pos += 1
+        size |= (c & 0x7F) << shift
+        shift += 7
+        if not c & 0x80:
+            return size, pos
+
+
+def apply_delta(base, delta):
+    """Applies a git pack delta to its base object."""
+    source_size, pos = _delta_size(delta, 0)
+    target_size, pos = _delta_size(delta, pos)
+    if source_size != len(base):
+        raise ValueError("delta does not match its base")
+
+    out = bytearray()
+    while pos < len(delta):
+        op = delta[pos]
+        pos += 1
+        if op & 0x80:
+            offset = size = 0
+            for i in range(4):
+                if op & (1 << i):
+                    offset |= delta[pos] << (8 * i)
+                    pos += 1
+            for i in range(3):
+                if op & (0x10 << i):
+                    size |= delta[pos] << (8 * i)
+                    pos += 1
+            out += base[offset:offset + (size or 0x10000)]
+        elif op:
+            out += delta[pos:pos + op]
+            pos += op
+        else:
+            raise ValueError("invalid delta opcode")
+
+    if len(out) != target_size:
+        raise ValueError("delta produced the wrong size")
+    return bytes(out)
+
+
+class Pack:
+    """One packfile and its version 2 index, both memory-mapped."""
+
+    def __init__(self, idx_path):
+        with open(idx_path, "rb") as f:
+            self.idx = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.idx[:8] != b"\xfftOc\x00\x00\x00\x02":
+            raise ValueError(f"unsupported pack index: {idx_path}")
+        with open(idx_path[:-4] + ".pack", "rb") as f:
+            self.pack = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.fanout = struct.unpack(">256I", self.idx[8:8 + 1024])
+        self.count = self.fanout[255]
+        self.sha_table = 8 + 1024
+        self.offset_table = self.sha_table + 24 * self.count
+        self.large_offset_table = self.offset_table + 4 * self.count
+
+    def find(self, sha):
+        """Returns the pack offset of a binary sha, or None."""
+        first = sha[0]
+        lo = self.fanout[first - 1] if first else 0
+        hi = self.fanout[first]
+        idx, base = self.idx, self.sha_table
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found = idx[base + 20 * mid:base + 20 * mid + 20]
+            if found < sha:
+                lo = mid + 1
+            elif found > sha:
+                hi = mid
+            else:
+                (offset,) = struct.unpack_from(">I", idx, self.offset_table + 4 * mid)
+                if offset & 0x80000000:
+                    (offset,) = struct.unpack_from(
+                        ">Q", idx, self.large_offset_table + 8 * (offset & 0x7FFFFFFF)
+                    )
+                return offset
+        return None
+
+    def header(self, offset):
+        """Returns (type number, inflated size, data position) of the entry at offset."""
+        data = self.pack
+        c = data[offset]
+        pos = offset + 1
+        kind = (c >> 4) & 7
+        size = c & 15
+        shift = 4
+        while c & 0x80:
+            c = data[pos]
+            pos += 1
+            size |= (c & 0x7F) << shift
+            shift += 7
+        return kind, size, pos
+
+    def inflate(self, pos, size):
+        decompressor = zlib.decompressobj()
+        parts = []
+        step = size + 64
+        while not decompressor.eof:
+            chunk = self.pack[pos:pos + step]
+            if not chunk:
+                raise ValueError("truncated pack entry")
+            parts.append(decompressor.decompress(chunk))
+            pos += step
+        return b"".join(parts)
+
+    def close(self):
+        self.idx.close()
+        self.pack.close()
+
+
+class ObjectStore:
+    """Reads objects from a repository's loose object directories and packs,
+    including the directories listed in objects/info/alternates.
+    """
+
+    def __init__(self, objects_dir, cache_size=64):
+        self.dirs = [objects_dir]
+        try:
+            with open(os.path.join(objects_dir, "info", "alternates")) as f:
+                for line in f:
+                    line = line.strip()
+                    if line and not line.startswith("#"):
+                        self.dirs.append(os.path.normpath(os.path.join(objects_dir, line)))
+        except OSError:
+            pass
+        self.packs = {}
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        self._load_packs()
+
+    def _load_packs(self):
+        for dir in self.dirs:
+            for idx_path in glob.glob(os.path.join(dir, "pack", "*.idx")):
+                if idx_path not in self.packs:
+                    try:
+                        self.packs[idx_path] = Pack(idx_path)
+                    except (OSError, ValueError):
+                        self.packs[idx_path] = None
+
+    def close(self):
+        for pack in self.packs.values():
+            if pack:
+                pack.close()
+        self.packs = {}
+
+    def _read_loose(self, hexsha):
+        for dir in self.dirs:
+            path = os.path.join(dir, hexsha[:2], hexsha[2:])
+            try:
+                with open(path, "rb") as f:
+                    raw = zlib.decompress(f.read())
+            except FileNotFoundError:
+                continue
+            header, _, data = raw.partition(b"\0")
+            kind, size = header.split(b" ")
+            if int(size) != len(data):
+                raise ValueError(f"corrupt loose object {hexsha}")
+            return kind.decode(), data
+        return None
+
+    def _read_packed(self, sha):
+        for pack in self.packs.values():
+            if pack is None:
+                continue
+            offset = pack.find(sha)
+            if offset is not None:
+                return self._read_pack_entry(pack, offset)
+        return None
+
+    def _read_pack_entry(self, pack, offset):
+        # walk down the delta chain to its base, then apply the deltas back up
+        deltas = []
+        while True:
+            cached = self.cache.get((id(pack), offset))
+            if cached:
+                kind, data = cached
+                break
+            kind, size, pos = pack.header(offset)
+            if kind == OFS_DELTA:
+                c = pack.pack[pos]
+                pos += 1
+                distance = c & 0x7F
+                while c & 0x80:
+                    c = pack.pack[pos]
+                    pos += 1
+                    distance = ((distance + 1) << 7) | (c & 0x7F)
+                deltas.append((offset, pack.inflate(pos, size)))
+                offset -= distance
+            elif kind == REF_DELTA:
+                base_sha = pack.pack[pos:pos + 20]
+                deltas.append((offset, pack.inflate(pos + 20, size)))
+                base = self.read(base_sha.hex())
+                if base is None:
+                    raise ValueError(f"missing delta base {base_sha.hex()}")
+                kind, data = base
+                break
+            else:
+                kind, data = OBJECT_TYPES[kind], pack.inflate(pos, size)
+                break
+
+        for offset, delta in reversed(deltas):
+            data = apply_delta(data, delta)
+            self._remember((id(pack), offset), (kind, data))
+        return kind, data
+
+    def _remember(self, key, value):
+        self.cache[key] = value
+        self.cache.move_to_end(key)
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+
+    def read(self, hexsha):
+        """Returns (type, content bytes) of an object, or None if it is not here."""
+        found = self._read_loose(hexsha)
+        if found:
+            return found
+        sha = bytes.fromhex(hexsha)
+        found = self._read_packed(sha)
+        if found is None:
+            # git may have repacked since the packs were listed
+            self._load_packs()
+            found = self._read_packed(sha)
+        return found
+
+
+def parse_tree(data):
+    """Yields (mode, name, hex sha) for each entry of a tree object."""
+    pos = 0
+    while pos < len(data):
+        space = data.index(b" ", pos)
+        nul = data.index(b"\0", space)
+        yield data[pos:space].decode(), data[space + 1:nul], data[nul + 1:nul + 21].hex()
+        pos = nul + 21
+
+
+def parse_headers(data):
+    """Returns the header fields of a commit or tag object, each as a list of values."""
+    headers = {}
+    for line in data.split(b"\n\n", 1)[0].split(b"\n"):
+        if line.startswith(b" "):
+            # a continuation line, e.g. of gpgsig
+            continue
+        key, _, value = line.partition(b" ")
+        headers.setdefault(key.decode(), []).append(value.decode(errors="replace"))
+    return headers
+
+
+# ======================================
+# repository
+# ======================================
+
+
+class GitNative:
+    """Answers simple repository questions by reading files under .git.
+
+    Every public method returns None when it cannot answer with certainty;
+    callers then ask the git CLI.
+    """
+
+    def __init__(self, git_dir):
+        self.git_dir = git_dir
+        common = os.path.join(git_dir, "commondir")
+        if os.path.isfile(common):
+            with open(common) as f:
+                self.common_dir = os.path.normpath(os.path.join(git_dir, f.read().strip()))
+        else:
+            self.common_dir = git_dir
+        self.config = GitConfig(self.common_dir)
+        self._objects = None
+
+    @classmethod
+    def open(cls, worktree):
+        git_dir = find_git_dir(worktree)
+        return cls(git_dir) if git_dir else None
+
+    def close(self):
+        if self._objects:
+            self._objects.close()
+            self._objects = None
+
+    def _supported(self):
+        # reftable, sha256 and per-worktree config are left to git
+        if self.config.get("extensions.refstorage") not in (None, "files"):
+            return False
+        if self.config.get("extensions.objectformat") not in (None, "sha1"):
+            return False
+        if self.config.get("extensions.worktreeconfig") not in (None, False, "false"):
+            return False
+        return True
+
+    # ---------------------------------- refs
+
+    def _ref_dir(self, name):
+        if name.startswith("refs/") and not name.startswith(PER_WORKTREE_REFS):
+            return self.common_dir
+        return self.git_dir
+
+    def packed_refs(self):
+        refs = {}
+        try:
+            with open(os.path.join(self.common_dir, "packed-refs")) as f:
+                for line in f:
+                    if line.startswith(("#", "^")):
+                        continue
+                    sha, _, name = line.strip().partition(" ")
+                    refs[name] = sha
+        except FileNotFoundError:
+            pass
+        return refs
+
+    def read_ref(self, name):
+        """Returns the raw content of a ref: a sha, or "ref: <target>" for
+        symbolic refs. None if the ref does not exist.
+        """
+        try:
+            with open(os.path.join(self._ref_dir(name), name)) as f:
+                content = f.read().strip()
+            if content:
+                return content
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            pass
+        return self.packed_refs().get(name)
+
+    def resolve_ref(self, name, depth=5):
+        """Follows symbolic refs down to a sha. None if the ref does not exist."""
+        for _ in range(depth):
+            content = self.read_ref(name)
+            if content is None:
+                return None
+            if not content.startswith("ref:"):
+                return content
+            name = content[4:].strip()
+        return None
+
+    @_or_none
+    def tips(self):
+        """Like `git for-each-ref --format=%(objectname)` plus `git rev-parse HEAD`:
+        the set of shas that every ref and HEAD point at.
+        """
+        if not self._supported():
+            return None
+        refs = self.packed_refs()
+        ref_dirs = [self.common_dir] if self.git_dir == self.common_dir else [self.common_dir, self.git_dir]
+        for ref_dir in ref_dirs:
+            for dirpath, _, filenames in os.walk(os.path.join(ref_dir, "refs")):
+                for filename in filenames:
+                    if not filename.endswith(".lock"):
+                        name = os.path.relpath(os.path.join(dirpath, filename), ref_dir).replace(os.sep, "/")
+                        refs[name] = self.resolve_ref(name)
+        tips = {sha for sha in refs.values() if sha}
+        head = self.resolve_ref("HEAD")
+        if head:
+            tips.add(head)
+        if not all(HEX_SHA.match(sha) for sha in tips):
+            return None
+        return tips
+
+    @_or_none
+    def head(self):
+        """Returns ("ref", "refs/heads/main") or ("detached", sha)."""
+        if not self._supported():
+            return None
+        with open(os.path.join(self.git_dir, "HEAD")) as f:
+            content = f.read().strip()
+        if content.startswith("ref:"):
+            return "ref", content[4:].strip()
+        return "detached", content
+
+    @_or_none
+    def branch(self):
+        """Like `git branch --show-current`: "" when HEAD is detached."""
+        head = self.head()
+        if head is None:
+            return None
+        kind, value = head
+        if kind == "ref" and value.startswith("refs/heads/"):
+            return value[len("refs/heads/"):]
+        return ""
+
+    @_or_none
+    def remotes(self):
+        """Like `git remote`: the configured remote names, sorted."""
+        if not self._supported():
+            return None
+        for legacy in ("remotes", "branches"):
+            path = os.path.join(self.common_dir, legacy)
+            if os.path.isdir(path) and os.listdir(path):
+                return None
+        return sorted(self.config.subsections("remote"))
+
+    @_or_none
+    def remote_url(self, name):
+        """Like `git remote get-url`. None for unknown remotes or url rewriting."""
+        if not self._supported() or self.config.has_section("url"):
+            return None
+        urls = self.config.get_all(f"remote.{name}.url")
+        return urls[0] if urls else None
+
+    @_or_none
+    def config_value(self, key):
+        """Like `git config <key>`: the last value, "" if it is not set."""
+        value = self.config.get(key, "")
+        return "true" if value is True else value
+
+    def _map_refspec(self, remote, ref):
+        for refspec in self.config.get_all(f"remote.{remote}.fetch"):
+            src, _, dst = refspec.lstrip("+").partition(":")
+            if "*" in src and "*" in dst:
+                prefix, suffix = src.split("*", 1)
+                if ref.startswith(prefix) and ref.endswith(suffix) and len(ref) >= len(prefix) + len(suffix):
+                    return dst.replace("*", ref[len(prefix):len(ref) - len(suffix)], 1)
+            elif src == ref and dst:
+                return dst
+        return None
+
+    def _abbrev(self, ref):
+        for prefix in ("refs/heads/", "refs/tags/", "refs/remotes/"):
+            if ref.startswith(prefix):
+                short = ref[len(prefix):]
+                break
+        else:
+            return None
+        ambiguous = [f"refs/{short}", f"refs/tags/{short}", f"refs/heads/{short}", f"refs/remotes/{short}"]
+        if any(name != ref and self.read_ref(name) for name in ambiguous):
+            return None
+        return short
+
+    @_or_none
+    def upstream(self):
+        """Like `git rev-parse --abbrev-ref --symbolic-full-name @{u}`.
+
+        Returns:
+            The upstream, e.g. "origin/main"; "" when the branch has none
+            or its remote-tracking ref does not exist; None to defer to git.
+        """
+        branch = self.branch()
+        if not branch:
+            return None
+        remote = self.config.get(f"branch.{branch}.remote")
+        merge = self.config.get(f"branch.{branch}.merge")
+        if not remote or not merge:
+            return ""
+        ref = merge if remote == "." else self._map_refspec(remote, merge)
+        if ref is None:
+            return None
+        if self.resolve_ref(ref) is None:
+            return ""
+        return self._abbrev(ref)
+
+    # ---------------------------------- objects
+
+    @property
+    def objects(self):
+        if self._objects is None:
+            self._objects = ObjectStore(os.path.join(self.common_dir, "objects"))
+        return self._objects
+
+    def _peel(self, sha, kind="commit"):
+        for _ in range(10):
+            found = self.objects.read(sha)
+            if found is None:
+                return None
+            if found[0] == kind:
+                return sha
+            if found[0] != "tag":
+                return None
+            sha = parse_headers(found[1])["object"][0]
+        return None
+
+    def _resolve_name(self, name):
+        if HEX_SHA.match(name):
+            return name
+        candidates = [name] if name == "HEAD" or name.startswith("refs/") else [
+            name,
+            f"refs/{name}",
+            f"refs/tags/{name}",
+            f"refs/heads/{name}",
+            f"refs/remotes/{name}",
+            f"refs/remotes/{name}/HEAD",
+        ]
+        for candidate in candidates:
+            if candidate != "HEAD" and not candidate.startswith("refs/"):
+                # top-level names other than HEAD are pseudo refs git treats specially
+                continue
+            sha = self.resolve_ref(candidate)
+            if sha:
+                return sha
+        return None
+
+    @_or_none
+    def resolve(self, rev):
+        """Resolves a revision to a sha: a full sha or ref name, optionally
+        followed by ~N / ^N suffixes. None for anything else.
+        """
+        if not self._supported():
+            return None
+        m = re.match(r"^([\w./-]+?)((?:[~^]\d*)*)$", rev)
+        if not m or ".." in m.group(1) or m.group(1).endswith((".lock", "/", ".")):
+            return None
+        sha = self._resolve_name(m.group(1))
+        if sha is None:
+            return None
+        for op, count in re.findall(r"([~^])(\d*)", m.group(2)):
+            sha = self._peel(sha)
+            if sha is None:
+                return None
+            count = int(count) if count else 1
+            if op == "^":
+                if count == 0:
+                    continue
+                parents = parse_headers(self.objects.read(sha)[1]).get("parent", [])
+                sha = parents[count - 1]
+            else:
+                for _ in range(count):
+                    sha = parse_headers(self.objects.read(sha)[1])["parent"][0]
+        return sha
+
+    @_or_none
+    def read_object(self, sha):
+        """Returns (sha, type, content bytes), or None."""
+        found = self.objects.read(sha)
+        return (sha, *found) if found else None
+
+    @_or_none
+    def read_path(self, rev, path):
+        """Reads "rev:path": returns (sha, type, content bytes), or None."""
+        sha = self.resolve(rev)
+        if sha is None:
+            return None
+        commit = self._peel(sha, "commit")
+        tree = self._peel(sha, "tree") if commit is None else parse_headers(self.objects.read(commit)[1])["tree"][0]
+        if tree is None:
+            return None
+
+        sha = tree
+        for part in [p for p in path.split("/") if p]:
+            kind, data = self.objects.read(sha)
+            if kind != "tree":
+                return None
+            part = os.fsencode(part)
+            for mode, name, entry_sha in parse_tree(data):
+                if name == part:
+                    if mode == "160000":
+                        # a submodule commit lives in another repository
+                        return None
+                    sha = entry_sha
+                    break
+            else:
+                return None
+        return self.read_object(sha)
+
+    @_or_none
+    def read(self, name):
+        """Like one `git cat-file --batch` request: "rev" or "rev:path"."""
+        rev, sep, path = name.partition(":")
+        if sep:
+            return self.read_path(rev, path) if rev else None
+        sha = self.resolve(rev)
+        return self.read_object(sha) if sha else None
@@ -0,0 +1,208 @@
+"""The file formats `readfile` and `writefile` understand, keyed by extension.
+
+Each format picks the fastest backend that is installed:
+
+    json: orjson, falling back to the stdlib json module
+    yaml: PyYAML's libyaml bindings (CSafeLoader / CDumper), falling back to pure Python
+    toml: tomllib for reading (Python 3.11+) and toml for writing
+
+Only yaml parses straight from the (possibly decompressing) file stream.
+json documents are read whole before parsing, since neither orjson nor the
+stdlib parses incrementally; use .jsonl and `iterfile` to stream records.
+
+Register additional formats with `register_format`.
+"""
+
+import io
+import re
+import json
+import math
+
+import yaml
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+YAML_DUMPER = getattr(yaml, "CDumper", yaml.Dumper)
+
+
+class Serializer:
+    """A file format.
+
+    Attributes:
+        name: The backend, for display, e.g. "orjson".
+        loads: Parses the file's content. None for formats that are read as
+               raw text.
+        dumps: Serializes data to a string. None for read-only formats.
+        binary: If True, loads receives bytes instead of str.
+        loader: Optionally parses straight from an open file, for backends
+                that can consume a stream without reading it into memory first.
+    """
+
+    __slots__ = ("name", "loads", "dumps", "binary", "loader")
+
+    def __init__(self, name, loads=None, dumps=None, binary=False, loader=None):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+        self.binary = binary
+        self.loader = loader
+
+    def load(self, f):
+        if self.loader:
+            return self.loader(f)
+        return self.loads(f.read())
+
+    def __repr__(self):
+        return f"Serializer({self.name!r})"
+
+
+FORMATS: dict[str, Serializer] = {}
+
+
+def register_format(extensions, loads=None, dumps=None, binary=False, name=None, loader=None):
+    """Registers (or replaces) the serializer for one or more extensions.
+
+    Args:
+        extensions: An extension without the leading dot, or a list of them.
+        loads: Parses file content into data.
+        dumps: Serializes data into a string.
+        binary: If True, loads is given the raw bytes of the file.
+        name: A display name for the backend.
+        loader: Parses data straight from an open file.
+
+    Returns:
+        The registered Serializer.
+    """
+    if isinstance(extensions, str):
+        extensions = [extensions]
+    serializer = Serializer(name or extensions[0], loads=loads, dumps=dumps, binary=binary, loader=loader)
+    for ext in extensions:
+        FORMATS[ext] = serializer
+    return serializer
+
+
+def get_format(extension):
+    """Returns the Serializer for an extension, or None if it has none."""
+    return FORMATS.get(extension)
+
+
+# 19 digits reach past 64 bits, which orjson would silently read as floats
+_LONG_NUMBER = re.compile(r"\d{19}")
+_LONG_NUMBER_BYTES = re.compile(rb"\d{19}")
+
+
+def orjson_loads(data):
+    """orjson.loads, deferring to the stdlib for what orjson reads differently:
+    integers wider than 64 bits, and NaN / Infinity, which orjson rejects.
+    """
+    long_number = _LONG_NUMBER if isinstance(data, str) else _LONG_NUMBER_BYTES
+    if long_number.search(data):
+        return json.loads(data)
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)
+
+
+def json_dumps(data):
+    return json.dumps(data, indent=2)
+
+
+def _has_non_finite(data):
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(map(_has_non_finite, data)) or any(map(_has_non_finite, data.values()))
+    if isinstance(data, (list, tuple)):
+        return any(map(_has_non_finite, data))
+    return False
+
+
+_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+
+
+def _escape_non_ascii(match):
+    n = ord(match.group())
+    if n > 0xFFFF:
+        n -= 0x10000
+        return "\\u{:04x}\\u{:04x}".format(0xD800 | (n >> 10), 0xDC00 | (n & 0x3FF))
+    return "\\u{:04x}".format(n)
+
+
+def orjson_dumps(data):
+    """orjson.dumps, but ASCII-only like the stdlib `json_dumps`:
+    non-ASCII characters are \\u-escaped. Data orjson cannot write
+    faithfully -- integers beyond 64 bits, and NaN / Infinity, which
+    orjson turns into null -- is handed to the stdlib.
+    """
+    try:
+        value = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        return json_dumps(data)
+    # a non-finite float can only have become a null
+    if b"null" in value and _has_non_finite(data):
+        return json_dumps(data)
+    value = value.decode()
+    return value if value.isascii() else _NON_ASCII.sub(_escape_non_ascii, value)
+
+
+def yaml_loads(s):
+    return yaml.load(s, Loader=YAML_LOADER)
+
+
+def yaml_dumps(data):
+    return yaml.dump(data, Dumper=YAML_DUMPER, indent=2)
+
+
+def toml_loads(s):
+    import toml
+
+    return toml.loads(s)
+
+
+def toml_dumps(data):
+    import toml
+
+    return toml.dumps(data)
+
+
+if orjson:
+    register_format("json", loads=orjson_loads, dumps=orjson_dumps, binary=True, name="orjson")
+else:
+    register_format("json", loads=json.loads, dumps=json_dumps, name="json")
+
+register_format(
+    ["yml", "yaml"],
+    loads=yaml_loads,
+    dumps=yaml_dumps,
+    loader=yaml_loads,
+    name="libyaml" if YAML_LOADER is not yaml.SafeLoader else "pyyaml",
+)
+
+register_format(
+    "toml",
+    loads=tomllib.loads if tomllib else toml_loads,
+    dumps=toml_dumps,
+    name="tomllib" if tomllib else "toml",
+)
+
+# txt files are read as raw text, but structured data is written as json
+register_format("txt", dumps=FORMATS["json"].dumps, name="txt")
+
+try:
+    import yb
+except ImportError:
+    yb = None
+
+if yb:
+    register_format("yb", loads=lambda s: yb.load(io.StringIO(s)), dumps=yb.dumps, name="yb")
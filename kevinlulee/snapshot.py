@@ -2,6 +2,8 @@
 
 import os
 import json
+import pickle
+from array import array
 import hashlib
 import difflib
 from datetime import datetime
@@ -119,6 +121,157 @@ class SnapshotCache:
         else:
             print(f"[not found] no snapshots for '{func_name}'")
 
+class DirectorySnapshot:
+    """A compact record of every file under a directory: its path relative
+    to the root, plus packed arrays of inode, size and mtime (ns).
+    Rows are kept sorted by path.
+
+    Take one with `scan`, persist it with `save` / `load`, and compare two
+    with `diff` to learn what changed in between without reading any file.
+    """
+
+    __slots__ = ("root", "paths", "inodes", "sizes", "mtimes")
+
+    def __init__(self, root, paths=None, inodes=None, sizes=None, mtimes=None):
+        self.root = root
+        self.paths = paths if paths is not None else []
+        self.inodes = inodes if inodes is not None else array("Q")
+        self.sizes = sizes if sizes is not None else array("q")
+        self.mtimes = mtimes if mtimes is not None else array("q")
+
+    @classmethod
+    def scan(cls, root, pattern=".", ignore_dirs=None, workers=None):
+        from kevinlulee.file_utils import walkfiles
+
+        root = os.path.expanduser(root)
+        prefix = len(os.path.join(root, ""))
+        rows = sorted(
+            (path[prefix:], st.st_ino, st.st_size, st.st_mtime_ns)
+            for path, st in walkfiles(root, pattern=pattern, stat=True, workers=workers, ignore_dirs=ignore_dirs)
+        )
+
+        snapshot = cls(root)
+        for path, inode, size, mtime in rows:
+            snapshot.paths.append(path)
+            snapshot.inodes.append(inode)
+            snapshot.sizes.append(size)
+            snapshot.mtimes.append(mtime)
+        return snapshot
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __eq__(self, other):
+        if not isinstance(other, DirectorySnapshot):
+            return NotImplemented
+        return (
+            self.root == other.root
+            and self.paths == other.paths
+            and self.mtimes == other.mtimes
+            and self.sizes == other.sizes
+            and self.inodes == other.inodes
+        )
+
+    __hash__ = None
+
+    def save(self, path):
+        from kevinlulee.file_utils import atomic_write
+
+        path = os.path.expanduser(path)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        data = {
+            "root": self.root,
+            "paths": self.paths,
+            "inodes": self.inodes,
+            "sizes": self.sizes,
+            "mtimes": self.mtimes,
+        }
+        atomic_write(path, pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        path = os.path.expanduser(path)
+        if not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            return cls(**pickle.load(f))
+
+    def diff(self, newer):
+        """Compares this snapshot with a newer one of the same directory.
+
+        A path counts as modified when its inode, size or mtime changed.
+        A deleted path and a created path sharing an inode, size and mtime
+        are reported as a move instead.
+
+        Returns:
+            A dict of relative paths: "created", "modified" and "deleted"
+            lists, and a "moved" list of (old, new) pairs.
+        """
+        old_paths, new_paths = self.paths, newer.paths
+        n, m = len(old_paths), len(new_paths)
+        i = j = 0
+        created = []
+        deleted = []
+        modified = []
+
+        # Both path lists are sorted, so one merge pass lines them up.
+        # Unchanged stretches are skipped a block at a time with slice
+        # comparisons, which run in C.
+        block = 512
+        while i < n and j < m:
+            if (
+                old_paths[i:i + block] == new_paths[j:j + block]
+                and self.mtimes[i:i + block] == newer.mtimes[j:j + block]
+                and self.sizes[i:i + block] == newer.sizes[j:j + block]
+                and self.inodes[i:i + block] == newer.inodes[j:j + block]
+            ):
+                i += block
+                j += block
+                continue
+
+            for _ in range(block):
+                if i >= n or j >= m:
+                    break
+                a, b = old_paths[i], new_paths[j]
+                if a == b:
+                    if (
+                        self.inodes[i] != newer.inodes[j]
+                        or self.sizes[i] != newer.sizes[j]
+                        or self.mtimes[i] != newer.mtimes[j]
+                    ):
+                        modified.append(b)
+                    i += 1
+                    j += 1
+                elif a < b:
+                    deleted.append(i)
+                    i += 1
+                else:
+                    created.append(j)
+                    j += 1
+        deleted.extend(range(i, n))
+        created.extend(range(j, m))
+
+        by_inode = {self.inodes[i]: i for i in deleted}
+        moved = []
+        still_created = []
+        for j in created:
+            i = by_inode.get(newer.inodes[j])
+            if i is not None and self.sizes[i] == newer.sizes[j] and self.mtimes[i] == newer.mtimes[j]:
+                moved.append((old_paths[i], new_paths[j]))
+                del by_inode[newer.inodes[j]]
+            else:
+                still_created.append(new_paths[j])
+        moved_from = {old for old, _ in moved}
+
+        return {
+            "created": still_created,
+            "modified": modified,
+            "deleted": [old_paths[i] for i in deleted if old_paths[i] not in moved_from],
+            "moved": moved,
+        }
+
+
 # ====================================== 
 # simple case:
 # ====================================== 
@@ -1,6 +1,7 @@
 import pytest
 
 
+import errno
 import os
 import shutil
 import tempfile
@@ -93,3 +94,58 @@ def test_mvdir_nested_structure():
         assert (dest_path / "file1.txt").exists()
         assert (dest_path / "dir1" / "file1.1.txt").exists()
         assert (dest_path / "dir1" / "dir2" / "file1.2.1.txt").exists()
+
+def test_mvdir_removes_source_entries(setup_directories):
+    source_dir, dest_dir = setup_directories
+
+    mvdir(dest_dir, source_dir)
+
+    assert list(Path(source_dir).iterdir()) == []
+    assert (Path(dest_dir) / "subdir" / "subfile1.txt").read_text() == "This is subfile 1"
+
+def test_mvdir_merges_into_existing_directory(setup_directories):
+    source_dir, dest_dir = setup_directories
+    (Path(dest_dir) / "subdir").mkdir()
+    (Path(dest_dir) / "subdir" / "kept.txt").write_text("kept")
+
+    mvdir(dest_dir, source_dir, force=True)
+
+    assert (Path(dest_dir) / "subdir" / "kept.txt").read_text() == "kept"
+    assert (Path(dest_dir) / "subdir" / "subfile1.txt").exists()
+    assert not (Path(source_dir) / "subdir").exists()
+
+def test_mvdir_dry_run(setup_directories):
+    source_dir, dest_dir = setup_directories
+    (Path(dest_dir) / "file1.txt").write_text("Existing file")
+
+    plan = mvdir(dest_dir, source_dir, dry_run=True)
+
+    actions = {Path(step["source"]).name: step["action"] for step in plan}
+    assert actions == {"file1.txt": "skip", "file2.txt": "rename", "subdir": "rename"}
+    assert (Path(source_dir) / "file2.txt").exists()
+
+def test_mvdir_never_replaces_a_directory_with_a_file(setup_directories):
+    source_dir, dest_dir = setup_directories
+    (Path(dest_dir) / "file1.txt").mkdir()
+    (Path(dest_dir) / "file1.txt" / "inner.txt").write_text("inner")
+
+    plan = mvdir(dest_dir, source_dir, force=True, dry_run=True)
+    assert {Path(step["source"]).name: step["action"] for step in plan}["file1.txt"] == "conflict"
+
+    mvdir(dest_dir, source_dir, force=True)
+
+    assert (Path(dest_dir) / "file1.txt" / "inner.txt").read_text() == "inner"
+    assert (Path(source_dir) / "file1.txt").read_text() == "This is file 1"
+
+def test_mvdir_copies_when_rename_crosses_devices(setup_directories, monkeypatch):
+    source_dir, dest_dir = setup_directories
+
+    def replace(src, dst):
+        raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setattr(os, "replace", replace)
+    mvdir(dest_dir, source_dir, force=True)
+
+    assert (Path(dest_dir) / "file1.txt").read_text() == "This is file 1"
+    assert (Path(dest_dir) / "subdir" / "subfile1.txt").read_text() == "This is subfile 1"
+    assert list(Path(source_dir).iterdir()) == []
@@ -0,0 +1,32 @@
+import subprocess
+
+import pytest
+
+
+def git(cwd, *args, text=True):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=text).stdout
+
+
+def init_repo(path):
+    path.mkdir()
+    git(path, "init", "-q", "-b", "main")
+    git(path, "config", "user.name", "Test User")
+    git(path, "config", "user.email", "test@example.com")
+    return path
+
+
+def commit_files(cwd, message, files: dict):
+    for rel_path, content in files.items():
+        full_path = cwd / rel_path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(content)
+    git(cwd, "add", "-A")
+    git(cwd, "commit", "-q", "-m", message)
+
+
+@pytest.fixture
+def repo_dir(tmp_path):
+    path = init_repo(tmp_path / "repo")
+    commit_files(path, "first | with pipe", {"a.txt": "one\ntwo\n"})
+    commit_files(path, "second", {"dir with space/b.txt": "b\n", "a.txt": "one\n"})
+    return path
@@ -3,7 +3,7 @@ import shutil
 import tempfile
 import subprocess
 from pathlib import Path
-from kevinlulee import cpfile  # update as needed
+from kevinlulee import cpfile, cpfiles  # update as needed
 
 
 def _compare_files(file1, file2):
@@ -44,3 +44,35 @@ def test_cpfile_directory_copy(tmp_path):
 
     _compare_files(bash_copy, py_copy)
 
+
+
+def test_cpfiles_bulk_copy(tmp_path):
+    sources = []
+    for i in range(5):
+        src = tmp_path / "src" / f"file{i}.txt"
+        src.parent.mkdir(exist_ok=True)
+        src.write_text(f"content {i}")
+        sources.append(src)
+
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    pairs = [(str(src), str(out_dir)) for src in sources[:3]]
+    pairs += [(str(sources[3]), str(tmp_path / "nested" / "deep" / "renamed.txt"))]
+
+    report = cpfiles(pairs, workers=2, verify=True)
+
+    assert report["bytes"] == sum(len(f"content {i}") for i in range(4))
+    assert all(entry["verified"] and entry["error"] is None for entry in report["files"])
+    for src in sources[:3]:
+        _compare_files(src, out_dir / src.name)
+    _compare_files(sources[3], tmp_path / "nested" / "deep" / "renamed.txt")
+
+
+def test_cpfiles_debug_copies_nothing(tmp_path):
+    src = tmp_path / "a.txt"
+    src.write_text("a")
+
+    report = cpfiles([(str(src), str(tmp_path / "out" / "b.txt"))], debug=True)
+    assert report["bytes"] == 0
+    assert [entry["dest"] for entry in report["files"]] == [str(tmp_path / "out" / "b.txt")]
+    assert not (tmp_path / "out").exists()
@@ -0,0 +1,32 @@
+import os
+
+from kevinlulee.dedupe import find_duplicates
+
+
+def test_find_duplicates(tmp_path):
+    big = b"a" * 200_000
+    same_edges = b"a" * 100_000 + b"b" + b"a" * 99_999
+
+    files = {
+        "one/small.txt": b"hello",
+        "two/small-copy.txt": b"hello",
+        "two/other.txt": b"world",
+        "one/big.bin": big,
+        "two/big-copy.bin": big,
+        "two/big-lookalike.bin": same_edges,
+        "unique.txt": b"only one of these sizes",
+    }
+    for rel, content in files.items():
+        (tmp_path / rel).parent.mkdir(exist_ok=True)
+        (tmp_path / rel).write_bytes(content)
+    os.link(tmp_path / "one" / "big.bin", tmp_path / "hardlink.bin")
+
+    result = find_duplicates(str(tmp_path), workers=2)
+
+    big_group, small_group = result["groups"]
+    assert small_group == [str(tmp_path / "one/small.txt"), str(tmp_path / "two/small-copy.txt")]
+    # the hard link shares an inode with big.bin, so only one of them is counted
+    assert len(big_group) == 2
+    assert str(tmp_path / "two/big-copy.bin") in big_group
+    assert str(tmp_path / "two/big-lookalike.bin") not in big_group
+    assert result["reclaimable"] == 200_000 + 5
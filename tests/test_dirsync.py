@@ -0,0 +1,66 @@
+import os
+
+from kevinlulee.dirsync import sync_directory
+from kevinlulee.file_utils import copy_directory_contents
+
+
+def create_files(base, files: dict):
+    for rel_path, content in files.items():
+        full_path = base / rel_path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text(content)
+
+
+def test_sync_directory_copies_then_skips(tmp_path):
+    src = tmp_path / "src"
+    dest = tmp_path / "dest"
+    create_files(src, {"a.txt": "aaa", "sub/b.txt": "bb", ".git/HEAD": "ref"})
+
+    first = sync_directory(str(src), str(dest))
+    assert first["files_copied"] == 3
+    assert first["bytes_copied"] == 8
+    assert (dest / "sub" / "b.txt").read_text() == "bb"
+
+    second = sync_directory(str(src), str(dest))
+    assert second["files_copied"] == 0
+    assert second["files_skipped"] == 3
+    assert second["bytes_skipped"] == 8
+
+
+def test_sync_directory_recopies_changed_files(tmp_path):
+    src = tmp_path / "src"
+    dest = tmp_path / "dest"
+    create_files(src, {"a.txt": "aaa", "b.txt": "bbb"})
+    copy_directory_contents(str(src), str(dest))
+
+    (src / "a.txt").write_text("changed")
+    report = sync_directory(str(src), str(dest))
+
+    assert report["files_copied"] == 1
+    assert (dest / "a.txt").read_text() == "changed"
+
+
+def test_sync_directory_checksum(tmp_path):
+    src = tmp_path / "src"
+    dest = tmp_path / "dest"
+    create_files(src, {"a.txt": "same"})
+    create_files(dest, {"a.txt": "same"})
+    os.utime(dest / "a.txt", (0, 0))
+
+    assert sync_directory(str(src), str(dest), checksum=True)["files_skipped"] == 1
+    assert sync_directory(str(src), str(dest))["files_copied"] == 1
+
+
+def test_copy_directory_contents_keeps_empty_and_symlinked_dirs(tmp_path):
+    src = tmp_path / "src"
+    dest = tmp_path / "dest"
+    create_files(src, {"a.txt": "a"})
+    (src / "empty").mkdir()
+    create_files(tmp_path / "elsewhere", {"f.txt": "f"})
+    os.symlink(tmp_path / "elsewhere", src / "linked")
+
+    copy_directory_contents(str(src), str(dest))
+    assert (dest / "a.txt").read_text() == "a"
+    assert (dest / "empty").is_dir()
+    assert not (dest / "linked").is_symlink()
+    assert (dest / "linked" / "f.txt").read_text() == "f"
@@ -0,0 +1,345 @@
+import gzip
+import json
+import os
+import re
+import types
+
+import pytest
+
+from kevinlulee.file_utils import (
+    FileContext,
+    ParseCache,
+    appendfile,
+    atomic_write,
+    clear_directory,
+    compact_appendfile,
+    find_git_directory,
+    find_project_root,
+    find_project_roots,
+    get_appendlog_path,
+    get_most_recent_file,
+    getfiles,
+    iterfile,
+    mapfile,
+    most_recent_files,
+    readfile,
+    walkfiles,
+    writefile,
+    writefiles,
+)
+
+
+def test_iterfile_jsonl(tmp_path):
+    path = tmp_path / "events.jsonl"
+    path.write_text('{"a": 1}\n\n{"a": 2}\n')
+
+    records = iterfile(str(path))
+    assert isinstance(records, types.GeneratorType)
+    assert list(records) == [{"a": 1}, {"a": 2}]
+
+
+def test_iterfile_multi_document_yaml(tmp_path):
+    path = tmp_path / "log.yml"
+    path.write_text("a: 1\n---\na: 2\n---\n")
+
+    assert list(readfile(str(path), stream=True)) == [{"a": 1}, {"a": 2}]
+
+
+def test_iterfile_csv(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text("name,age\nalice,30\nbob,40\n")
+
+    assert list(iterfile(str(path))) == [
+        {"name": "alice", "age": "30"},
+        {"name": "bob", "age": "40"},
+    ]
+
+
+def test_iterfile_missing_file(tmp_path):
+    assert list(iterfile(str(tmp_path / "nope.jsonl"))) == []
+    assert list(readfile(str(tmp_path / "nope.jsonl"), stream=True)) == []
+    for record in readfile(str(tmp_path / "nope.yml"), stream=True):
+        pytest.fail("a missing file has no records")
+
+
+def test_mapfile_is_searchable_and_sliceable(tmp_path):
+    path = tmp_path / "blob.bin"
+    path.write_bytes(b"header\x00needle in a haystack")
+
+    with mapfile(str(path)) as m:
+        assert m[:6] == b"header"
+        assert re.search(rb"needle", m).start() == 7
+        assert bytes(memoryview(m)[7:13]) == b"needle"
+
+
+def test_mapfile_empty_and_missing(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_text("")
+
+    assert mapfile(str(path)) == b""
+    with mapfile(str(path)) as m:
+        assert m[:10] == b""
+        assert re.search(rb"x", m) is None
+    assert readfile(str(tmp_path / "missing.txt"), mapped=True) is None
+
+
+def test_mapped_read_skips_format_detection(tmp_path):
+    for name in ("README", "archive.gz"):
+        path = tmp_path / name
+        path.write_bytes(b"raw bytes")
+        with readfile(str(path), mapped=True) as m:
+            assert m[:] == b"raw bytes"
+    assert readfile(str(tmp_path / "missing_without_extension")) is None
+
+
+def test_writefiles_bulk(tmp_path):
+    files = {
+        str(tmp_path / "a" / "one.json"): {"x": 1},
+        str(tmp_path / "a" / "two.txt"): "hello",
+        str(tmp_path / "b" / "c" / "three.yml"): {"y": [1, 2]},
+    }
+
+    report = writefiles(files, workers=2, fsync=True)
+
+    assert [r["path"] for r in report] == list(files)
+    assert readfile(str(tmp_path / "a" / "one.json")) == {"x": 1}
+    assert readfile(str(tmp_path / "b" / "c" / "three.yml")) == {"y": [1, 2]}
+    assert report[1]["bytes"] == 5
+    assert not [p for p in tmp_path.rglob("*.tmp")]
+
+
+def test_writefiles_rejects_empty_data(tmp_path):
+    with pytest.raises(AssertionError):
+        writefiles({str(tmp_path / "ok.txt"): "ok", str(tmp_path / "bad.txt"): ""})
+    assert not (tmp_path / "ok.txt").exists()
+
+
+def test_atomic_write_keeps_existing_mode(tmp_path):
+    path = tmp_path / "script.sh"
+    path.write_text("old")
+    path.chmod(0o755)
+
+    atomic_write(str(path), "new")
+    assert path.read_text() == "new"
+    assert path.stat().st_mode & 0o777 == 0o755
+
+
+def test_appendfile_log_is_merged_and_compacted(tmp_path):
+    path = str(tmp_path / "events.json")
+    writefile(path, [{"id": 1}])
+
+    appendfile(path, [{"id": 2}], log=True)
+    appendfile(path, [{"id": 3}], log=True)
+
+    assert readfile(path) == [{"id": 1}, {"id": 2}, {"id": 3}]
+    assert json.loads((tmp_path / "events.json").read_text()) == [{"id": 1}]
+
+    compact_appendfile(path)
+
+    assert not os.path.exists(get_appendlog_path(path))
+    assert json.loads((tmp_path / "events.json").read_text()) == [{"id": 1}, {"id": 2}, {"id": 3}]
+
+
+def test_full_write_drops_the_append_log(tmp_path):
+    path = str(tmp_path / "state.json")
+    appendfile(path, {"a": 1}, log=True)
+    writefile(path, {"b": 2})
+
+    assert not os.path.exists(get_appendlog_path(path))
+    assert readfile(path) == {"b": 2}
+
+    appendfile(path, {"a": 1}, log=True)
+    writefiles({path: {"c": 3}})
+
+    assert not os.path.exists(get_appendlog_path(path))
+    assert readfile(path) == {"c": 3}
+
+
+def test_appendfile_log_without_base_file(tmp_path):
+    path = str(tmp_path / "state.yml")
+
+    appendfile(path, {"a": 1}, log=True)
+    appendfile(path, {"b": 2}, log=True, compact_after=1)
+
+    assert not os.path.exists(get_appendlog_path(path))
+    assert readfile(path) == {"a": 1, "b": 2}
+
+
+def test_readfile_parse_cache(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text('{"a": [1]}')
+    cache = ParseCache()
+
+    first = cache.read(str(path))
+    first["a"].append(2)
+    assert cache.read(str(path)) == {"a": [1]}
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    path.write_text('{"a": [1, 2, 3]}')
+    assert cache.read(str(path)) == {"a": [1, 2, 3]}
+    assert cache.misses == 2
+
+    cache.invalidate(str(path))
+    assert cache.stats["entries"] == 0
+
+
+def test_parse_cache_evicts_by_bytes(tmp_path):
+    cache = ParseCache(max_bytes=20)
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.json").write_text('{"key": "0123"}')
+        cache.read(str(tmp_path / f"{name}.json"))
+
+    assert list(cache.entries) == [str(tmp_path / "c.json")]
+    assert cache.stats["bytes"] <= 20
+
+
+def test_walkfiles_prunes_ignored_dirs(tmp_path):
+    for rel in ("a.py", "sub/b.py", "sub/c.txt", "node_modules/d.py", "sub/.git/e.py"):
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text("x")
+
+    expected = [str(tmp_path / "a.py"), str(tmp_path / "sub" / "b.py")]
+    assert sorted(walkfiles(str(tmp_path), pattern=r"\.py$")) == expected
+    assert sorted(walkfiles(str(tmp_path), pattern=r"\.py$", workers=4)) == expected
+    assert getfiles(str(tmp_path), pattern=r"\.py$") == expected[:1]
+    assert getfiles(str(tmp_path), pattern=r"\.py$", recursive=True, sort=True) == expected
+
+
+def test_walkfiles_with_stat(tmp_path):
+    (tmp_path / "a.txt").write_text("hello")
+
+    [(path, st)] = walkfiles(str(tmp_path), stat=True)
+    assert path == str(tmp_path / "a.txt")
+    assert st.st_size == 5
+
+
+def test_clear_directory(tmp_path):
+    for rel in ("a.txt", "b.txt", "sub/c.txt", "sub/deeper/d.txt"):
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text("1234")
+    os.symlink(tmp_path / "sub", tmp_path / "link")
+
+    expected = {"files": 5, "directories": 2, "bytes": 16 + len(str(tmp_path / "sub"))}
+    assert clear_directory(str(tmp_path), dry_run=True) == expected
+    assert (tmp_path / "sub" / "deeper" / "d.txt").exists()
+
+    assert clear_directory(str(tmp_path), workers=2) == expected
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_find_project_roots(tmp_path):
+    (tmp_path / "proj" / ".git").mkdir(parents=True)
+    (tmp_path / "proj" / "pkg" / "sub").mkdir(parents=True)
+    (tmp_path / "lib" / "lib.egg-info").mkdir(parents=True)
+    (tmp_path / "proj" / "pkg" / "a.py").write_text("")
+
+    paths = [
+        str(tmp_path / "proj" / "pkg" / "a.py"),
+        str(tmp_path / "proj" / "pkg" / "sub"),
+        str(tmp_path / "lib"),
+    ]
+    roots = find_project_roots(paths)
+
+    assert roots == {
+        paths[0]: str(tmp_path / "proj"),
+        paths[1]: str(tmp_path / "proj"),
+        paths[2]: str(tmp_path / "lib"),
+    }
+    assert find_project_root(paths[0]) == str(tmp_path / "proj")
+    assert find_git_directory(paths[1]) == str(tmp_path / "proj")
+
+
+def test_find_project_root_sees_new_markers(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    start = str(tmp_path / "a" / "b")
+    assert find_project_root(start) != str(tmp_path / "a")
+
+    (tmp_path / "a" / ".git").mkdir()
+    assert find_project_root(start) == str(tmp_path / "a")
+
+
+def test_file_context_is_lazy_and_refreshable(tmp_path):
+    path = tmp_path / "notes.json"
+    path.write_text('{"a": 1}')
+
+    ctx = FileContext(str(path))
+    assert (ctx.name, ctx.ext, ctx.size) == ("notes", "json", 8)
+    assert ctx.content == {"a": 1}
+
+    path.write_text('{"a": 22}')
+    assert ctx.content == {"a": 1}
+    assert ctx.refresh().content == {"a": 22}
+    assert ctx.size == 9
+    assert not hasattr(ctx, "__dict__")
+
+
+def test_file_context_scan(tmp_path):
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "a.txt").write_text("aa")
+    (tmp_path / "sub" / "b.txt").write_text("bbbb")
+
+    table = FileContext.scan(str(tmp_path))
+
+    assert len(table) == 2
+    assert table.total_size == 6
+    assert sorted(row["path"] for row in table) == [str(tmp_path / "a.txt"), str(tmp_path / "sub" / "b.txt")]
+
+    context = table.context(0)
+    assert context.stat is table.stats[0]
+
+
+def test_most_recent_files(tmp_path):
+    a, b = tmp_path / "a", tmp_path / "b"
+    for rel, mtime in (("a/old.txt", 100), ("a/new.txt", 300), ("b/mid.txt", 200), ("b/.hidden.txt", 400), ("b/x.log", 500)):
+        (tmp_path / rel).parent.mkdir(exist_ok=True)
+        (tmp_path / rel).write_text("")
+        os.utime(tmp_path / rel, (mtime, mtime))
+
+    assert most_recent_files([str(a), str(b)], pattern="*.txt", k=2) == [str(a / "new.txt"), str(b / "mid.txt")]
+    assert get_most_recent_file(str(b)) == str(b / "x.log")
+    assert most_recent_files([str(a), str(b)], since={"hours": 1}) == []
+
+    os.utime(a / "old.txt")
+    assert most_recent_files([str(a), str(b)], k=None, since={"hours": 1}) == [str(a / "old.txt")]
+
+
+def test_get_most_recent_file_with_subdirectory_pattern(tmp_path):
+    (tmp_path / "sub" / "deeper").mkdir(parents=True)
+    (tmp_path / "top.txt").write_text("")
+    (tmp_path / "sub" / "x.txt").write_text("")
+    (tmp_path / "sub" / "deeper" / "y.txt").write_text("")
+
+    assert get_most_recent_file(str(tmp_path), "sub/*.txt") == str(tmp_path / "sub" / "x.txt")
+    assert get_most_recent_file(str(tmp_path), "*/*.txt") == str(tmp_path / "sub" / "x.txt")
+    assert get_most_recent_file(str(tmp_path), "*/*/*.txt") == str(tmp_path / "sub" / "deeper" / "y.txt")
+    assert get_most_recent_file(str(tmp_path), "nope/*.txt") is None
+
+
+@pytest.mark.parametrize("codec", ["gz", "xz", "bz2"])
+def test_compressed_files(tmp_path, codec):
+    data = {"a": [1, 2, 3]}
+    path = str(tmp_path / f"data.json.{codec}")
+    writefile(path, data)
+    assert readfile(path) == data
+    assert (tmp_path / f"data.json.{codec}").read_bytes()[:1] != b"{"
+
+    log = str(tmp_path / f"log.jsonl.{codec}")
+    appendfile(log, '{"n": 1}')
+    appendfile(log, '{"n": 2}')
+    assert list(iterfile(log)) == [{"n": 1}, {"n": 2}]
+
+    [report] = writefiles({str(tmp_path / f"bulk.yml.{codec}"): data})
+    assert readfile(report["path"]) == data
+
+
+def test_compressed_file_without_inner_extension(tmp_path):
+    path = tmp_path / "archive.gz"
+    path.write_bytes(b"")
+    with pytest.raises(ValueError, match="Unknown format"):
+        readfile(str(path))
+    assert readfile(str(tmp_path / "missing.gz")) is None
+
+    path.write_bytes(gzip.compress(b"line 1\nline 2\n"))
+    assert list(readfile(str(path), stream=True)) == ["line 1\n", "line 2\n"]
+    with readfile(str(path), mapped=True) as m:
+        assert m[:2] == b"\x1f\x8b"
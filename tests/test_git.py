@@ -0,0 +1,313 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from kevinlulee.git import GitRepo
+
+from conftest import commit_files, git
+
+
+def test_iter_history(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    history = repo.get_history()
+
+    assert [c["message"] for c in history] == ["second", "first | with pipe"]
+    assert history[0]["author"] == "Test User"
+    assert sorted((f["filename"], f["insertions"], f["deletions"]) for f in history[0]["files"]) == [
+        ("a.txt", 0, 1),
+        ("dir with space/b.txt", 1, 0),
+    ]
+    assert [c["message"] for c in repo.iter_history(limit=1)] == ["second"]
+    assert [c["message"] for c in repo.iter_history(paths=["dir with space"])] == ["second"]
+
+
+def test_iter_history_can_stop_early(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    history = repo.iter_history()
+    assert next(history)["message"] == "second"
+    history.close()
+
+
+def test_history_index_is_incremental(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    index = repo.history_index
+
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+
+    commit_files(repo_dir, "third", {"c.txt": "c\n"})
+    git(repo_dir, "checkout", "-q", "-b", "side", "HEAD~1")
+    commit_files(repo_dir, "on side", {"a.txt": "side\n"})
+
+    assert index.refresh() == 2
+    assert index.history(refresh=False)[0]["message"] in ("third", "on side")
+    assert sorted(c["message"] for c in index.history()) == ["first | with pipe", "on side", "second", "third"]
+    assert len(index.file_commits("a.txt")) == 3
+    assert index.historical_files("c.txt") == ["c.txt"]
+    index.close()
+
+
+def test_show_uses_one_cat_file_process(repo_dir):
+    with GitRepo(str(repo_dir)) as repo:
+        assert repo.commands.show("HEAD~1", "a.txt") == "one\ntwo"
+        assert repo.commands.show("HEAD", "dir with space/b.txt") == "b"
+        assert repo.show_many([("HEAD", "a.txt"), ("HEAD~1", "a.txt")]) == ["one", "one\ntwo"]
+        # read natively, without starting git
+        assert repo._cat_file.proc is None
+
+        # the index is not read natively
+        assert repo.show_many([("", "a.txt"), ("HEAD", "a.txt")]) == ["one", "one"]
+        proc = repo._cat_file.proc
+        assert proc is not None
+        assert repo.cat_file(":a.txt") == b"one\n"
+        assert repo._cat_file.proc is proc
+        assert repo.object_info("HEAD:a.txt")[1:] == ("blob", 4)
+
+        assert repo.show_many([("HEAD", "nope.txt")]) == ["fatal: invalid object name 'HEAD:nope.txt'"]
+        assert repo.errors == ["fatal: invalid object name 'HEAD:nope.txt'"]
+        assert repo.object_info("HEAD:nope.txt") is None
+
+    assert proc.poll() is not None
+
+
+def test_get_files_porcelain_v2(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    git(repo_dir, "mv", "dir with space/b.txt", "renamed \"b\".txt")
+    (repo_dir / "a.txt").write_text("changed\n")
+    (repo_dir / "new file.txt").write_text("new\n")
+
+    files = {os.path.relpath(f["file"], repo_dir): f for f in repo.get_files()}
+    assert files["a.txt"]["status"] == "modified"
+    assert files["a.txt"]["xy"] == ".M"
+    assert not files["a.txt"]["staged"] and files["a.txt"]["unstaged"]
+    renamed = files['renamed "b".txt']
+    assert renamed["status"] == "renamed" and renamed["staged"]
+    assert renamed["original"] == str(repo_dir / "dir with space" / "b.txt")
+    assert files["new file.txt"]["status"] == "created"
+    assert files["a.txt"]["submodule"] is None
+    assert [f["file"] for f in repo.get_files("created")] == [str(repo_dir / "new file.txt")]
+
+
+def test_get_files_is_cached(repo_dir, monkeypatch):
+    repo = GitRepo(str(repo_dir))
+    (repo_dir / "a.txt").write_text("changed\n")
+    assert [f["status"] for f in repo.get_files()] == ["modified"]
+
+    calls = []
+    run = subprocess.run
+    monkeypatch.setattr(subprocess, "run", lambda *a, **k: calls.append(a) or run(*a, **k))
+    assert [f["status"] for f in repo.get_files()] == ["modified"]
+    assert calls == []
+
+    (repo_dir / "c.txt").write_text("c\n")
+    assert sorted(f["status"] for f in repo.get_files()) == ["created", "modified"]
+    assert calls
+
+
+def test_get_files_skips_ignored_directories(repo_dir, monkeypatch):
+    repo = GitRepo(str(repo_dir))
+    (repo_dir / ".gitignore").write_text("build/\n")
+    (repo_dir / "build").mkdir()
+    (repo_dir / "build" / "out.o").write_text("1")
+    assert [f["status"] for f in repo.get_files()] == ["created"]
+    # the first call learns the ignored directories, the second caches without them
+    assert [f["status"] for f in repo.get_files()] == ["created"]
+    assert repo._status_cache[1] == {".git", str(repo_dir / "build")}
+
+    calls = []
+    run = subprocess.run
+    monkeypatch.setattr(subprocess, "run", lambda *a, **k: calls.append(a) or run(*a, **k))
+    (repo_dir / "build" / "out.o").write_text("22")
+    assert [f["status"] for f in repo.get_files()] == ["created"]
+    assert calls == []
+
+    (repo_dir / ".git" / "info").mkdir(exist_ok=True)
+    (repo_dir / ".git" / "info" / "exclude").write_text(".gitignore\n")
+    assert repo.get_files() == []
+    assert calls
+
+
+def test_get_files_returns_copies(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    (repo_dir / "a.txt").write_text("changed\n")
+    repo.get_files()[0]["status"] = "edited"
+    assert repo.get_files()[0]["status"] == "modified"
+
+
+def test_get_files_is_cached_in_linked_worktrees(repo_dir, tmp_path, monkeypatch):
+    worktree = tmp_path / "worktree"
+    git(repo_dir, "worktree", "add", "-q", str(worktree))
+    repo = GitRepo(str(worktree))
+    (worktree / "a.txt").write_text("changed\n")
+    assert [f["status"] for f in repo.get_files()] == ["modified"]
+
+    calls = []
+    run = subprocess.run
+    monkeypatch.setattr(subprocess, "run", lambda *a, **k: calls.append(a) or run(*a, **k))
+    assert [f["status"] for f in repo.get_files()] == ["modified"]
+    assert calls == []
+
+
+def test_get_commit_infos(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    git(repo_dir, "mv", "a.txt", "c.txt")
+    git(repo_dir, "commit", "-q", "-m", "rename", "-m", "with a body")
+
+    infos = repo.get_commit_infos(
+        ["HEAD", "HEAD~2", "nope", "main"], hash=True, body=True, changed_files=True
+    )
+    assert infos[0]["subject"] == "rename"
+    assert infos[0]["body"] == "with a body"
+    assert infos[0]["author"] == "Test User <test@example.com>"
+    assert infos[0]["changed_files"] == "c.txt"
+    assert infos[1]["subject"] == "first | with pipe"
+    assert infos[1]["changed_files"] == "a.txt"
+    assert infos[2] == {}
+    assert repo.errors == ["fatal: bad revision 'nope'"]
+    assert infos[3] == infos[0]
+    assert set(infos[0]) == {
+        "hash", "author", "author_date", "committer", "committer_date", "subject", "body", "changed_files"
+    }
+
+    assert repo.get_commit_info("HEAD~1", author=False, committer=False, author_date=False, committer_date=False) == {
+        "subject": "second"
+    }
+
+
+def test_path_index_follows_renames(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    index = repo.path_index
+    assert index.refresh() == 2
+
+    git(repo_dir, "mv", "a.txt", "c.txt")
+    git(repo_dir, "commit", "-q", "-m", "rename")
+    commit_files(repo_dir, "edit", {"c.txt": "one\nthree\n"})
+    assert index.refresh() == 2
+    assert index.refresh() == 0
+
+    hashes = git(repo_dir, "log", "--format=%H").split()
+    assert index.file_commits("c.txt") == hashes
+    assert index.file_commits("c.txt", follow=False) == hashes[:2]
+    assert index.file_commits("a.txt") == hashes[1:]
+    assert index.file_commits("a.txt", refresh=False) == repo.get_file_commits("a.txt")
+    assert sorted(index.historical_files()) == ["a.txt", "c.txt", "dir with space/b.txt"]
+    assert index.historical_files("space") == ["dir with space/b.txt"]
+    assert index.files_commits(["dir with space/b.txt"]) == {"dir with space/b.txt": [hashes[2]]}
+
+
+def test_iter_history_reports_errors(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    assert list(repo.iter_history(revs=["nope"])) == []
+    assert "nope" in repo.errors[0]
+
+
+def test_stream_records_across_chunks(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    script = "import sys; sys.stdout.buffer.write(b'a' * 200000 + b'\\x1e\\x1eb\\x1e' + b'c' * 70000)"
+    records = list(repo._stream_records([sys.executable, "-c", script]))
+    assert records == [b"a" * 200000, b"b", b"c" * 70000]
+
+
+def test_indexes_refresh_without_forking_when_nothing_changed(repo_dir, monkeypatch):
+    repo = GitRepo(str(repo_dir))
+    assert repo.history_index.refresh() == 2
+    assert repo.path_index.refresh() == 2
+
+    calls = []
+    run, popen = subprocess.run, subprocess.Popen
+    monkeypatch.setattr(subprocess, "run", lambda *a, **k: calls.append(a) or run(*a, **k))
+    monkeypatch.setattr(subprocess, "Popen", lambda *a, **k: calls.append(a) or popen(*a, **k))
+    for _ in range(20):
+        repo.history_index.file_commits("a.txt")
+        repo.path_index.file_commits("a.txt")
+    assert calls == []
+
+
+def test_history_index_outside_a_repository(tmp_path):
+    from kevinlulee.git_index import HistoryIndex
+
+    with pytest.raises(ValueError, match="Not a git repository"):
+        HistoryIndex(GitRepo(str(tmp_path)))
+
+
+def test_indexes_retry_after_git_fails(repo_dir, monkeypatch):
+    repo = GitRepo(str(repo_dir))
+    indexes = [repo.history_index, repo.path_index]
+    for index in indexes:
+        assert index.refresh() == 2
+    commit_files(repo_dir, "third", {"c.txt": "c\n"})
+
+    def failing(args, input=None):
+        repo.on_error("fatal: simulated")
+        return iter(())
+
+    monkeypatch.setattr(repo, "_stream_records", failing)
+    for index in indexes:
+        assert index.refresh() == 0
+    monkeypatch.undo()
+
+    for index in indexes:
+        assert index.refresh() == 1
+    assert repo.history_index.history(refresh=False)[0]["message"] == "third"
+    assert repo.path_index.file_commits("c.txt", refresh=False)
+
+
+def test_indexes_survive_vanished_tips(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    git(repo_dir, "checkout", "-q", "-b", "temp")
+    commit_files(repo_dir, "temporary", {"t.txt": "t\n"})
+    assert repo.history_index.refresh() == 3
+    assert repo.path_index.refresh() == 3
+
+    git(repo_dir, "checkout", "-q", "main")
+    git(repo_dir, "branch", "-q", "-D", "temp")
+    git(repo_dir, "reflog", "expire", "--expire=now", "--all")
+    git(repo_dir, "gc", "-q", "--prune=now")
+    commit_files(repo_dir, "after gc", {"d.txt": "d\n"})
+
+    assert repo.history_index.refresh() == 1
+    assert repo.path_index.refresh() == 1
+    assert repo.errors == []
+
+
+def test_cat_file_names_with_spaces(repo_dir, monkeypatch):
+    repo = GitRepo(str(repo_dir))
+    cat_file = repo._cat_file
+    assert cat_file.get_many(["HEAD:a b", "HEAD:a.txt", "HEAD:dir with space/b.txt"]) == [
+        None,
+        cat_file.get("HEAD:a.txt"),
+        cat_file.get("HEAD:dir with space/b.txt"),
+    ]
+    assert cat_file.get("HEAD:a.txt")[2] == b"one\n"
+
+    # a failed read restarts the process instead of leaving responses queued
+    read = cat_file._read
+    calls = []
+
+    def failing_read(stdout):
+        calls.append(1)
+        if len(calls) == 1:
+            raise ValueError("boom")
+        return read(stdout)
+
+    monkeypatch.setattr(cat_file, "_read", failing_read)
+    with pytest.raises(ValueError):
+        cat_file.get_many(["HEAD:a.txt", "HEAD~1:a.txt"])
+    assert cat_file.proc is None
+    assert cat_file.get("HEAD~1:a.txt")[2] == b"one\ntwo\n"
+
+
+def test_get_commit_infos_with_spaces_in_unknown_names(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    infos = repo.get_commit_infos(["no such commit", "HEAD"], author=False, committer=False)
+    assert infos[0] == {}
+    assert infos[1]["subject"] == "second"
+
+
+def test_unknown_refs_with_suffixes_go_to_on_error(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    assert repo.show_many([("nope~1", "a.txt")]) == ["fatal: invalid object name 'nope~1:a.txt'"]
+    assert repo.cat_file("nope^2") is None
+    assert repo.errors == ["fatal: invalid object name 'nope~1:a.txt'"]
@@ -0,0 +1,61 @@
+import pytest
+
+from kevinlulee.git_fleet import GitFleet, parse_status
+
+from conftest import commit_files, git, init_repo
+
+
+@pytest.fixture
+def repos(tmp_path):
+    paths = []
+    for i in range(4):
+        remote = tmp_path / f"remote{i}.git"
+        git(tmp_path, "init", "-q", "--bare", "-b", "main", str(remote))
+        path = init_repo(tmp_path / f"repo{i}")
+        commit_files(path, "first", {"a.txt": f"{i}\n"})
+        git(path, "remote", "add", "origin", str(remote))
+        git(path, "push", "-q", "-u", "origin", "main")
+        paths.append(path)
+    return paths
+
+
+def test_fleet_commit_and_push(repos):
+    (repos[0] / "b.txt").write_text("new\n")
+    (repos[2] / "a.txt").write_text("changed\n")
+
+    with GitFleet([str(path / ".git") for path in repos], workers=2) as fleet:
+        status = fleet.status()
+        assert [s["path"] for s in status] == [str(path) for path in repos]
+        assert [s["result"]["clean"] for s in status] == [False, True, False, True]
+        assert status[0]["result"]["branch"] == "main"
+        assert status[0]["result"]["upstream"] == "origin/main"
+
+        commits = fleet.commit_all("fleet commit")
+        assert all(c["ok"] for c in commits)
+        assert [c["result"] is None for c in commits] == [False, True, False, True]
+
+        ahead = [s["result"]["ahead"] for s in fleet.status()]
+        assert ahead == [1, 0, 1, 0]
+
+        pushed = fleet.push("origin", "main")
+        assert all(p["ok"] and p["seconds"] >= 0 for p in pushed)
+        assert [s["result"]["ahead"] for s in fleet.status()] == [0, 0, 0, 0]
+        assert git(repos[0].parent / "remote0.git", "log", "-1", "--format=%s").strip() == "fleet commit"
+
+
+def test_fleet_collects_errors(repos):
+    fleet = GitFleet([str(repos[0]), str(repos[1])])
+    git(repos[1], "remote", "remove", "origin")
+
+    results = fleet.fetch()
+    assert results[0]["ok"] and not results[0]["errors"]
+    assert not results[1]["ok"]
+    assert "origin" in results[1]["errors"][0]
+
+
+def test_parse_status():
+    status = parse_status("## main...origin/main [ahead 2, behind 1]\n M a.txt\n?? b.txt")
+    assert status["branch"] == "main"
+    assert (status["ahead"], status["behind"]) == (2, 1)
+    assert status["changes"] == [" M a.txt", "?? b.txt"]
+    assert parse_status("## No commits yet on main")["branch"] == "main"
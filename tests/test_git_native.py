@@ -0,0 +1,121 @@
+import pytest
+
+from kevinlulee.git import GitRepo
+from kevinlulee.git_native import GitNative, parse_config
+
+from conftest import commit_files, git, init_repo
+
+
+@pytest.fixture
+def repo_dir(tmp_path):
+    """Overrides the conftest repo with one whose big.txt has five versions, for deltas."""
+    path = init_repo(tmp_path / "repo")
+    lines = [f"line {i} " + "x" * 40 for i in range(2000)]
+    for version in range(5):
+        lines[version * 300] = f"changed in version {version}"
+        commit_files(path, f"version {version}", {"big.txt": "\n".join(lines), f"small{version}.txt": f"{version}\n"})
+    git(path, "tag", "-a", "v1", "-m", "tag", "HEAD~2")
+    return path
+
+
+def all_objects(path):
+    output = git(path, "cat-file", "--batch-all-objects", "--batch-check")
+    return [line.split() for line in output.splitlines()]
+
+
+def test_reads_packed_and_loose_objects(repo_dir):
+    git(repo_dir, "repack", "-adq", "--depth=10", "--window=10")
+    commit_files(repo_dir, "loose", {"loose.txt": "loose\n"})
+
+    native = GitNative.open(str(repo_dir))
+    objects = all_objects(repo_dir)
+    assert len(objects) > 10
+    for sha, kind, size in objects:
+        assert native.read_object(sha) == (sha, kind, git(repo_dir, "cat-file", kind, sha, text=False))
+
+    for rev in ["HEAD", "HEAD~2", "HEAD^", "main~1^1", "v1", "refs/heads/main"]:
+        assert native.resolve(rev) == git(repo_dir, "rev-parse", rev).strip()
+    assert native.read("HEAD~1:big.txt")[2] == git(repo_dir, "show", "HEAD~1:big.txt", text=False)
+    assert native.read("v1:small0.txt")[2] == b"0\n"
+    assert native.read("HEAD:nope.txt") is None
+    assert native.resolve("HEAD@{1}") is None
+    assert native.resolve("nope~1") is None
+    assert native.read("nope^2:small0.txt") is None
+    native.close()
+
+
+def test_properties_match_the_cli(repo_dir, tmp_path):
+    remote = tmp_path / "remote.git"
+    git(tmp_path, "init", "-q", "--bare", str(remote))
+    git(repo_dir, "remote", "add", "origin", str(remote))
+    git(repo_dir, "remote", "add", "backup", "/elsewhere")
+    git(repo_dir, "push", "-q", "-u", "origin", "main")
+    git(repo_dir, "pack-refs", "--all")
+
+    repo = GitRepo(str(repo_dir))
+    assert repo.is_git_directory()
+    assert repo.branch == "main"
+    assert repo.remotes == ["backup", "origin"]
+    assert repo.url == str(remote)
+    assert repo.username == "Test User"
+    assert repo.symbolic_full_name == "origin/main"
+    assert repo.remote == "origin"
+
+    git(repo_dir, "checkout", "-q", "-b", "feature")
+    assert repo.branch == "feature"
+    assert repo.symbolic_full_name is None
+
+    git(repo_dir, "checkout", "-q", "--detach")
+    assert repo.branch == ""
+    assert repo.errors == []
+
+
+def test_tips_match_the_cli(repo_dir, tmp_path):
+    def cli_tips(path):
+        return set(git(path, "for-each-ref", "--format=%(objectname)").split()) | {git(path, "rev-parse", "HEAD").strip()}
+
+    git(repo_dir, "branch", "old", "HEAD~3")
+    git(repo_dir, "pack-refs", "--all")
+    git(repo_dir, "branch", "loose", "HEAD~1")
+    git(repo_dir, "checkout", "-q", "--detach", "HEAD~4")
+    assert GitNative.open(str(repo_dir)).tips() == cli_tips(repo_dir)
+
+    worktree = tmp_path / "worktree"
+    git(repo_dir, "worktree", "add", "-q", "--detach", str(worktree), "main~2")
+    assert GitNative.open(str(worktree)).tips() == cli_tips(worktree)
+
+
+def test_falls_back_to_the_cli(repo_dir):
+    repo = GitRepo(str(repo_dir))
+    with open(repo_dir / ".git" / "config", "a") as f:
+        f.write('[include]\n\tpath = extra\n')
+    (repo_dir / ".git" / "extra").write_text("[user]\n\tname = Included\n")
+
+    assert repo.native.config_value("user.name") is None
+    assert repo.username == "Included"
+
+
+def test_parse_config():
+    text = r'''
+# comment
+[core]
+    bare = false ; trailing comment
+    flag
+[remote "my \"odd\" remote"]
+    url = "/path with  spaces" # comment
+    fetch = +refs/heads/*:refs/remotes/odd/*
+[Branch.Main] remote = origin
+[alias]
+    lg = log \
+        --oneline
+    say = "a;b" \t"c"
+'''
+    assert parse_config(text) == [
+        ("core", None, "bare", "false"),
+        ("core", None, "flag", True),
+        ("remote", 'my "odd" remote', "url", "/path with  spaces"),
+        ("remote", 'my "odd" remote', "fetch", "+refs/heads/*:refs/remotes/odd/*"),
+        ("branch", "main", "remote", "origin"),
+        ("alias", None, "lg", "log" + " " * 9 + "--oneline"),
+        ("alias", None, "say", "a;b \tc"),
+    ]
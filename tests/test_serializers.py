@@ -0,0 +1,65 @@
+import json
+
+from kevinlulee.file_utils import readfile, writefile
+from kevinlulee.serializers import FORMATS, get_format, register_format
+
+
+def test_round_trip_builtin_formats(tmp_path):
+    data = {"name": "kevin", "tags": ["a", "b"], "nested": {"n": 1}}
+    for ext in ("json", "yml", "yaml", "toml"):
+        path = str(tmp_path / f"data.{ext}")
+        writefile(path, data)
+        assert readfile(path) == data
+
+
+def test_txt_writes_json_and_reads_raw(tmp_path):
+    path = str(tmp_path / "data.txt")
+    writefile(path, [1, 2])
+    assert json.loads(readfile(path)) == [1, 2]
+
+
+def test_register_format(tmp_path, monkeypatch):
+    monkeypatch.setitem(FORMATS, "kv", None)
+    register_format(
+        "kv",
+        loads=lambda s: dict(line.split("=", 1) for line in s.splitlines()),
+        dumps=lambda d: "\n".join(f"{k}={v}" for k, v in d.items()),
+    )
+
+    path = str(tmp_path / "settings.kv")
+    writefile(path, {"a": "1", "b": "2"})
+
+    assert (tmp_path / "settings.kv").read_text() == "a=1\nb=2"
+    assert readfile(path) == {"a": "1", "b": "2"}
+    assert get_format("kv").name == "kv"
+
+
+def test_json_keeps_big_integers_and_nan(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text('{"b": 123456789012345678901234567890, "n": -9223372036854775809, "x": NaN, "i": Infinity}')
+
+    data = readfile(str(path))
+    assert data["b"] == 123456789012345678901234567890
+    assert data["n"] == -9223372036854775809
+    assert data["x"] != data["x"]
+    assert data["i"] == float("inf")
+    assert FORMATS["json"].loads('{"b": 123456789012345678901234567890}') == {"b": 123456789012345678901234567890}
+
+
+def test_json_writes_nan_and_non_ascii_like_the_stdlib(tmp_path):
+    path = str(tmp_path / "data.json")
+    data = {"x": float("nan"), "i": float("inf"), "n": None, "s": "caf\u00e9 \U0001f600"}
+    writefile(path, data)
+
+    text = (tmp_path / "data.json").read_text()
+    assert text == json.dumps(data, indent=2)
+    assert text.isascii()
+
+    written = readfile(path)
+    assert written["x"] != written["x"]
+    assert written["i"] == float("inf")
+    assert written["n"] is None
+    assert written["s"] == data["s"]
+
+    data = {"s": "caf\u00e9 \U0001f600", "l": [1, 2.5, {}], "n": None}
+    assert FORMATS["json"].dumps(data) == json.dumps(data, indent=2)
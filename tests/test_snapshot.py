@@ -0,0 +1,38 @@
+import os
+
+from kevinlulee.snapshot import DirectorySnapshot
+
+
+def test_directory_snapshot_diff(tmp_path):
+    root = tmp_path / "tree"
+    for rel in ("keep.txt", "edit.txt", "gone.txt", "sub/move-me.txt"):
+        (root / rel).parent.mkdir(parents=True, exist_ok=True)
+        (root / rel).write_text(rel)
+
+    before = DirectorySnapshot.scan(str(root))
+    saved = before.save(str(tmp_path / "snapshots" / "tree.pkl"))
+
+    (root / "edit.txt").write_text("edited contents")
+    (root / "gone.txt").unlink()
+    (root / "new.txt").write_text("new")
+    os.rename(root / "sub" / "move-me.txt", root / "moved.txt")
+
+    after = DirectorySnapshot.scan(str(root))
+    diff = DirectorySnapshot.load(saved).diff(after)
+
+    assert diff == {
+        "created": ["new.txt"],
+        "modified": ["edit.txt"],
+        "deleted": ["gone.txt"],
+        "moved": [(os.path.join("sub", "move-me.txt"), "moved.txt")],
+    }
+    assert after.diff(DirectorySnapshot.scan(str(root))) == {
+        "created": [],
+        "modified": [],
+        "deleted": [],
+        "moved": [],
+    }
+
+
+def test_directory_snapshot_load_missing(tmp_path):
+    assert DirectorySnapshot.load(str(tmp_path / "missing.pkl")) is None